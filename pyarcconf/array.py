@@ -1,3 +1,5 @@
+import itertools
+
 from . import runner
 
 
@@ -38,33 +40,35 @@ class Array():
         return result
 
     def update(self, config=''):
+        """Parse the array info
+
+        Args:
+            config (str|list): GETCONFIG AR output without the header, queried if not given
+        """
         if config and type(config) == list:
-            config = '\n'.join(config)
-        section = config or self._get_config()
-        section = section.split(runner.SEPARATOR_SECTION)
-        for line in section[0].split('\n'):
-            if runner.SEPARATOR_ATTRIBUTE in line:
-                key, value = runner.convert_property(line)
-                self.__setattr__(key, value)
+            lines = config
+        elif config:
+            lines = config.split('\n')
+        else:
+            lines = itertools.islice(self.controller._stream('GETCONFIG', ['AR', self.id]), 4, None)
+        for section, subsection, key, value in runner.tokenize(lines):
+            if subsection is None:
+                # skipping other sections since they are parsed in self.drives and self.vds
+                break
+            if key is not None:
+                value = runner.convert_value_attribute(value)
+                self.__setattr__(runner.convert_key_attribute(key), value)
                 # pystorcli compliance
-                key = runner.convert_key_dict(line)
-                self.facts[key] = value
-        # skipping other sections since they are parsed in self.drives and self.vds
+                self.facts[runner.convert_key_dict(key)] = value
 
     @property
     def drives(self):
         config = self._get_config()
         config = config.split(runner.SEPARATOR_SECTION)[-1]
-        drives = []
-        for line in config.split('\n'):
-            if line:
-                serial = line.split(')')[1].strip()
-                # TODO: create new objects instead of getting them from the controller ?
-                for d in self.controller.drives:
-                    if serial == d.serial:
-                        d.update()
-                        drives.append(d)
-        return drives
+        serials = [line.split(')')[1].strip() for line in config.split('\n') if line]
+        # all member drives are refreshed by a single GETCONFIG PD call
+        drives = self.controller.get_pds_by_serial()
+        return [drives[serial] for serial in serials if serial in drives]
     
     # pysmart compliance
     @property
@@ -82,16 +86,20 @@ class Array():
 
     @property
     def vds(self):
+        return self.get_vds()
+
+    def get_vds(self, vds=None):
+        """Get the logical drives of the array.
+
+        Args:
+            vds (list): already parsed controller logical drives, queried once if not given
+        Return:
+            list: list of LogicalDrive objects
+        """
         config = self._get_config()
         config = config.split(runner.SEPARATOR_SECTION)[-4]
-        drives = []
-        print(config)
-        for line in config.split('\n'):
-            if line:
-                name = line.split(')')[1].strip()
-                # TODO: create new objects instead of getting them from the controller ?
-                for d in self.controller.get_vds():
-                    if name == d.name:
-                        d.update()
-                        drives.append(d)
-        return drives
+        names = [line.split(')')[1].strip() for line in config.split('\n') if line]
+        if vds is None:
+            vds = self.controller.get_vds()
+        vds = {d.name: d for d in vds}
+        return [vds[name] for name in names if name in vds]
@@ -0,0 +1,263 @@
+"""Parser benchmarks over the bundled datasets
+
+Every parse entry point is replayed from the captured outputs in datasets/ with ReplayRunner,
+so no controller is needed and only the parsing cost is measured.
+
+Usage:
+    python -m pyarcconf.benchmark [-n NUMBER] [--drives 256 --enclosures 8]
+    python -m pyarcconf.benchmark --import-time [--import-budget USEC]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from . import runner
+from .controller import Controller
+from .mvcli import Controller as MvcliController
+from .physical_drive import PhysicalDrive
+
+# case name, required dataset file, callable(controller)
+ARCCONF_CASES = [
+    ('update', '_getconfig_1_ad', lambda c: c.update()),
+    ('get_config', '_getconfig_1', lambda c: c.get_config()),
+    ('get_pds', '_getconfig_1_pd', lambda c: c.get_pds()),
+    ('get_vds', '_getconfig_1_ld', lambda c: c.get_vds()),
+    ('get_arrays', '_getconfig_1_ar', lambda c: c.get_arrays()),
+    ('get_tasks', '_getstatus_1', lambda c: c.get_tasks()),
+    ('connectors', '_getconfig_1_cn', lambda c: c.connectors),
+    ('phyerrorcounters', '_phyerrorlog_1', lambda c: c.phyerrorcounters),
+    ('get_phy_errors', '_phyerrorlog_1', lambda c: c.get_phy_errors()),
+    ('get_version', '_getversion', lambda c: c.get_version()),
+]
+
+# modules of the parse entry points and their import time budget in usec, see import_time()
+IMPORT_MODULES = ('pyarcconf.controller', 'pyarcconf.mvcli')
+IMPORT_BUDGET_USEC = 40000
+# heavy modules which have to be imported on first use only
+LAZY_MODULES = ('asyncio', 'concurrent.futures', 'humanfriendly', 'json', 'xml.etree.ElementTree')
+
+MVCLI_CASES = [
+    ('mvcli get_pds', 'info_pd', lambda c: c.get_pds()),
+    ('mvcli get_vds', 'info_vd', lambda c: c.get_vds()),
+    ('mvcli get_events', 'event', lambda c: c.get_events()),
+]
+
+
+def measure(func, number=100):
+    """Measure a call of func.
+
+    Args:
+        func (callable): function without arguments
+        number (int): number of timed calls
+    Returns:
+        dict: usec per call, number of memory blocks allocated by a single call which are alive when it returns,
+            its result included, and its peak memory in KiB, as traced by tracemalloc
+    """
+    func()
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    usec = (time.perf_counter() - start) / number * 1e6
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+    allocations = sum(stat.count_diff for stat in after.compare_to(before, 'lineno') if stat.count_diff > 0)
+    return {'usec': usec, 'allocations': allocations, 'peak_kib': peak / 1024}
+
+
+def import_time(modules=IMPORT_MODULES, number=5):
+    """Measure the import time of modules in fresh interpreters with python -X importtime.
+
+    Args:
+        modules (tuple): imported modules
+        number (int): number of interpreters, the best time is taken, at least 2
+    Returns:
+        dict: cumulative usec of the pyarcconf imports and the list of LAZY_MODULES which were imported
+    """
+    code = 'import sys, {}; print(" ".join(m for m in {!r} if m in sys.modules))'.format(', '.join(modules), LAZY_MODULES)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get('PYTHONPATH')])))
+    # the first interpreter writes the bytecode, so the best time is the one of a usual start
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    result = {'usec': None, 'loaded': []}
+    for _ in range(max(2, number)):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=env, check=True)
+        usec = 0
+        for line in proc.stderr.split('\n'):
+            parts = line.split('|')
+            # top level imports have a single space before the name
+            if len(parts) != 3 or parts[2].startswith('  ') or not parts[2].strip().startswith('pyarcconf'):
+                continue
+            usec += int(parts[1])
+        if result['usec'] is None or usec < result['usec']:
+            result['usec'] = usec
+        result['loaded'] = proc.stdout.split()
+    return result
+
+
+def check_import_time(budget=IMPORT_BUDGET_USEC):
+    """Print the import time and check it against the budget.
+
+    Args:
+        budget (int): usec
+    Returns:
+        bool: True if the imports are within the budget and no lazy module was imported
+    """
+    result = import_time()
+    print('import {}: {} usec, budget {} usec'.format(', '.join(IMPORT_MODULES), result['usec'], budget))
+    if result['loaded']:
+        print('modules which should be imported on first use: {}'.format(', '.join(result['loaded'])))
+    return result['usec'] <= budget and not result['loaded']
+
+
+def arcconf_cases(dataset, controller_dataset=None):
+    """Build the arcconf benchmark cases of a dataset.
+
+    Args:
+        dataset (str): dataset directory or name
+        controller_dataset (str): dataset to initialize the controller with if dataset has no GETCONFIG AD output
+    Returns:
+        list: list of (case name, callable) pairs
+    """
+    replay = runner.ReplayRunner(dataset)
+    ctrl = Controller(1, runner.ReplayRunner(controller_dataset) if controller_dataset else replay)
+    ctrl.runner = replay
+    # GETVERSION outputs are captured without the controller id
+    if '_getversion' in replay._files:
+        replay._files.setdefault('_getversion_1', replay._files['_getversion'])
+    cases = []
+    for name, required, func in ARCCONF_CASES:
+        if required in replay._files:
+            cases.append((name, lambda func=func: func(ctrl)))
+    for name in replay._files:
+        match = re.match(r'_phyerrorlog_1_device_(\d+)_(\d+)$', name)
+        if match:
+            drive = PhysicalDrive(ctrl, *match.groups())
+            cases.append((f'pd {drive.channel},{drive.device} phyerrorcounters', lambda d=drive: d.phyerrorcounters))
+    return cases
+
+
+def mvcli_cases(dataset='mvcli'):
+    """Build the mvcli benchmark cases of a dataset.
+
+    Args:
+        dataset (str): dataset directory or name
+    Returns:
+        list: list of (case name, callable) pairs
+    """
+    replay = runner.ReplayRunner(dataset, path='mvcli')
+    ctrl = MvcliController(0, replay)
+    return [(name, lambda func=func: func(ctrl)) for name, required, func in MVCLI_CASES if required in replay._files]
+
+
+def synthesize(drives=256, enclosures=8, directory=None):
+    """Create a dataset of a controller with many drives, built from the raid_unconfigured outputs.
+
+    Args:
+        drives (int): number of drives
+        enclosures (int): number of enclosures, the drives are spread across them
+        directory (str): output directory, created if missing, a temporary one if not given
+    Returns:
+        str: dataset directory
+    """
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    else:
+        directory = tempfile.mkdtemp(prefix='pyarcconf_')
+    source = os.path.join(runner.DATASETS, 'raid_unconfigured')
+    with open(os.path.join(source, '_getconfig_1_AD')) as f:
+        adapter = runner.sanitize_stdout(f.read(), 'Command ')
+    with open(os.path.join(source, '_getconfig_1_PD')) as f:
+        pd = runner.cut_lines(runner.sanitize_stdout(f.read(), 'Command '), 4)
+    # first drive of channel 0 and first enclosure of channel 2 are the templates
+    drive_template = pd.split('      Device #9\n')[0].split('   Channel #0:\n')[1]
+    enclosure_template = pd.split('   Channel #2:\n')[1]
+
+    lines = ['   Channel #0:']
+    per_enclosure = max(1, -(-drives // enclosures))
+    for idx in range(drives):
+        block = drive_template
+        block = block.replace('Device #8', f'Device #{idx}')
+        block = re.sub(r'(Reported Channel,Device\(T:L\)\s+: )0,8\(8:0\)', rf'\g<1>0,{idx}({idx}:0)', block)
+        block = re.sub(r'(Reported Location\s+: )Enclosure 1, Slot 0',
+                       rf'\g<1>Enclosure {idx // per_enclosure}, Slot {idx % per_enclosure}', block)
+        block = re.sub(r'(Serial number\s+: ).*', rf'\g<1>SYN{idx:08d}', block)
+        lines.append(block.rstrip('\n') + '\n')
+    lines.append('   Channel #2:')
+    for idx in range(enclosures):
+        block = enclosure_template
+        block = block.replace('Device #0', f'Device #{idx}')
+        block = re.sub(r'(Reported Channel,Device\(T:L\)\s+: )2,0\(0:0\)', rf'\g<1>2,{idx}({idx}:0)', block)
+        block = re.sub(r'(Reported Location\s+: .*Enclosure )1', rf'\g<1>{idx}', block)
+        block = re.sub(r'(Enclosure ID\s+: )1', rf'\g<1>{idx}', block)
+        lines.append(block.rstrip('\n'))
+    pd = '\n'.join(lines)
+
+    header = '\n'.join([70 * '-', 'Physical Device information', 70 * '-'])
+    outputs = {
+        '_getconfig_1_AD': adapter,
+        '_getconfig_1_PD': 'Controllers found: 1\n' + header + '\n' + pd,
+        '_getconfig_1': adapter + '\n' + header + '\n' + pd,
+    }
+    for name, output in outputs.items():
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(output + '\n\nCommand completed successfully.\n')
+    return directory
+
+
+def run(number=100, drives=0, enclosures=8):
+    """Run all benchmarks and print the results.
+
+    Args:
+        number (int): number of timed calls per case
+        drives (int): also benchmark a synthesized dataset with this number of drives
+        enclosures (int): number of enclosures of the synthesized dataset
+    Returns:
+        list: list of (dataset, case name, result) tuples
+    """
+    suites = [
+        ('hba', arcconf_cases('hba')),
+        ('raid_unconfigured', arcconf_cases('raid_unconfigured')),
+        ('raid', arcconf_cases('raid', 'raid_unconfigured')),
+        ('mvcli', mvcli_cases()),
+    ]
+    if drives:
+        suites.append((f'{drives} drives/{enclosures} enclosures', arcconf_cases(synthesize(drives, enclosures))))
+    results = []
+    print('{:<32} {:<36} {:>12} {:>10} {:>12}'.format('dataset', 'case', 'usec/call', 'allocs', 'peak KiB'))
+    for dataset, cases in suites:
+        for name, func in cases:
+            try:
+                result = measure(func, number)
+            except Exception as e:
+                print('{:<32} {:<36} failed: {}'.format(dataset, name, repr(e)))
+                continue
+            results.append((dataset, name, result))
+            print('{:<32} {:<36} {:>12.1f} {:>10} {:>12.1f}'.format(
+                dataset, name, result['usec'], result['allocations'], result['peak_kib']))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark pyarcconf parsers over the bundled datasets')
+    parser.add_argument('-n', '--number', type=int, default=100, help='number of timed calls per case')
+    parser.add_argument('--drives', type=int, default=0, help='also benchmark a synthesized dataset with this number of drives')
+    parser.add_argument('--enclosures', type=int, default=8, help='number of enclosures of the synthesized dataset')
+    parser.add_argument('--import-time', action='store_true', help='check the import time against the budget and exit')
+    parser.add_argument('--import-budget', type=int, default=IMPORT_BUDGET_USEC, help='import time budget in usec')
+    args = parser.parse_args()
+    if args.import_time:
+        sys.exit(0 if check_import_time(args.import_budget) else 1)
+    run(args.number, args.drives, args.enclosures)
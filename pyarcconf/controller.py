@@ -1,17 +1,27 @@
+import itertools
 import re
 
 from . import runner
 from .array import Array
 from .enclosure import Enclosure
 from .logical_drive import LogicalDrive
+from .phy import PhyCounters, PhyErrorTable, parse_phyerrorlog
 from .physical_drive import PhysicalDrive
 from .task import Task
 
+PD_HEADER = re.compile(r'(Channel|Device) #(\d+):?$')
 
-def get_controllers(arcconf_runner=None):
+# attribute groups of a controller which are loaded on demand
+SECTIONS = ('adapter', 'connectors', 'pds', 'vds', 'arrays', 'tasks')
+
+def get_controllers(arcconf_runner=None, parallel=False, max_workers=None, lazy=False, snapshot=False):
     """Get all controller objects for further interaction.
     Args:
         arcconf_runner: runner object
+        parallel (bool): initialize and fully refresh all controllers concurrently
+        max_workers (int): max number of controllers queried at the same time, all of them if not given
+        lazy (bool): create the controllers without querying them, see Controller
+        snapshot (bool): parse each controller from a single GETCONFIG call, see Controller.initialize()
     Return:
         list: list of controller objects.
     """
@@ -23,27 +33,97 @@ def get_controllers(arcconf_runner=None):
     res = runner.cut_lines(res, 6)
     res = list(filter(None, res.split('\n')))
     ids = [line.split(':')[0].strip().split()[1] for line in res]
-    return [Controller(i, arcconf_runner) for i in ids]
+    if not parallel:
+        return [Controller(i, arcconf_runner, lazy, snapshot) for i in ids]
+
+    def _discover(controller_id):
+        ctrl = Controller(controller_id, arcconf_runner, lazy, snapshot)
+        if lazy:
+            ctrl.initialize(snapshot)
+            return ctrl
+        # the adapter info or the whole snapshot was parsed on init
+        if not snapshot:
+            ctrl.get_pds()
+            ctrl.get_vds()
+        ctrl.get_tasks()
+        return ctrl
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max_workers or len(ids)) as pool:
+        # map keeps the order of the LIST output
+        return list(pool.map(_discover, ids))
+
+
+async def async_get_controllers(arcconf_runner=None):
+    """Async version of get_controllers(), all controllers are updated concurrently.
+    Args:
+        arcconf_runner: AsyncCMDRunner object
+    Return:
+        list: list of controller objects.
+    """
+    arcconf_runner = arcconf_runner or runner.AsyncCMDRunner()
+    res = (await arcconf_runner.run([arcconf_runner.path, 'LIST']))[0]
+    res = runner.sanitize_stdout(res, 'Command ')
+    if not res:
+        return []
+    res = runner.cut_lines(res, 6)
+    res = list(filter(None, res.split('\n')))
+    ids = [line.split(':')[0].strip().split()[1] for line in res]
+    import asyncio
+    controllers = [Controller(i, arcconf_runner) for i in ids]
+    await asyncio.gather(*[c.async_update() for c in controllers])
+    return controllers
 
 
 class Controller():
     """Object which represents a controller."""
 
-    def __init__(self, controller_id, cmdrunner=None):
-        """Initialize a new controller object."""
+    def __init__(self, controller_id, cmdrunner=None, lazy=False, snapshot=False):
+        """Initialize a new controller object.
+
+        Args:
+            controller_id (str): controller id
+            cmdrunner: runner object
+            lazy (bool): do not query the controller now, every attribute group (adapter info through
+                adapter or facts, connectors, drives, vds, arrays, tasks) is loaded on first access
+            snapshot (bool): parse controller, arrays, logical and physical drives from a single GETCONFIG call
+                instead of the GETCONFIG AD call, see get_config()
+        """
         self.id = str(controller_id)
         self.runner = cmdrunner or runner.CMDRunner()
+        self.lazy = lazy
+        # loaded attribute groups, see SECTIONS, without lazy mode drives and connectors are
+        # loaded on first access and the other groups by their get_* methods only
+        self._loaded = set() if lazy else set(SECTIONS) - {'connectors', 'pds'}
+        self._adapter_attrs = set()
 
         self._drives = []
-        self.vds = []
-        self.enclosures = []
-        self.tasks = []
+        self._vds = []
+        self._arrays = []
+        self._enclosures = []
+        self._tasks = []
+        self._connectors = {}
 
         # pystorcli compliance
-        self.facts = {}
+        if not lazy:
+            self.facts = {}
         self.name = self.id
 
-        self.update()
+        if lazy or getattr(self.runner, 'asynchronous', False):
+            return
+        if snapshot:
+            self.get_config()
+        else:
+            self.update()
+
+    def __getattr__(self, name):
+        """Load the adapter info on first access of its facts in lazy mode.
+        Any other missing attribute raises AttributeError without querying the controller,
+        so the adapter info attributes are set once the adapter section is loaded, see adapter.
+        """
+        if name != 'facts' or 'adapter' in self.__dict__.get('_loaded', SECTIONS):
+            raise AttributeError(name)
+        return self.adapter
 
     def __repr__(self):
         """Define a basic representation of the class object."""
@@ -69,14 +149,50 @@ class Controller():
         Raises:
             RuntimeError: if command fails
         """
-        args = args or []
-        if type(cmd) == str:
-            cmd = [cmd]
-        out, err, rc = self.runner.run(args=[self.runner.path] + cmd + [self.id] + args, universal_newlines=True)
+        out, err, rc = self.runner.run(args=self._args(cmd, args), universal_newlines=True)
+        if out:
+            out = runner.sanitize_stdout(out, 'Command ')
+        return out, rc
+
+    async def _async_exec(self, cmd, args=None):
+        """Async version of _exec(), the runner has to be an AsyncCMDRunner"""
+        out, err, rc = await self.runner.run(args=self._args(cmd, args))
         if out:
             out = runner.sanitize_stdout(out, 'Command ')
         return out, rc
 
+    def _stream(self, cmd, args=None):
+        """Execute a command with runner and iterate over the output lines while they are read
+
+        Args:
+            cmd (str|list): arcconf command
+            args (list): command arguments after the controller id
+        Returns:
+            iterator: output lines
+        Raises:
+            RuntimeError: if the command fails
+        """
+        if not hasattr(self.runner, 'stream'):
+            out, rc = self._exec(cmd, args)
+            if rc:
+                raise RuntimeError(f'{self._args(cmd, args)} failed with return code {rc}')
+            return iter(out.split('\n'))
+        return self.runner.stream(self._args(cmd, args))
+
+    def _args(self, cmd, args=None):
+        """Build the full command line of a controller command
+
+        Args:
+            cmd (str|list): arcconf command
+            args (list): command arguments after the controller id
+        Returns:
+            list: command line
+        """
+        args = args or []
+        if type(cmd) == str:
+            cmd = [cmd]
+        return [self.runner.path] + cmd + [self.id] + args
+
     def _execute(self, cmd, args=[]):
         """Execute a controller command
 
@@ -89,17 +205,133 @@ class Controller():
         """
         return self._exec(cmd, args)[0]
 
-    def initialize(self):
-        self.update()
-        self.get_pds()
-        self.get_vds()
+    async def _async_execute(self, cmd, args=[]):
+        """Async version of _execute()"""
+        return (await self._async_exec(cmd, args))[0]
+
+    def initialize(self, snapshot=False, cache=None):
+        """Parse all the controller objects
+
+        Args:
+            snapshot (bool): parse controller, arrays, logical and physical drives from a single GETCONFIG call,
+                create the controller with lazy=True so that GETCONFIG AD is not run on init as well
+            cache (SnapshotCache): parsed state cache of the GETCONFIG output, implies snapshot
+        """
+        if snapshot or cache is not None:
+            self.get_config(cache)
+        else:
+            self.update()
+            self.get_pds()
+            self.get_vds()
         self.get_tasks()
 
+    @runner.single_flight
+    def get_config(self, cache=None):
+        """Parse the whole controller configuration from a single GETCONFIG call.
+        Each top level section of the output is passed to the matching parse method.
+
+        Args:
+            cache (SnapshotCache): parsed state cache, the state is loaded from it if the output did not change
+        Return:
+            Controller: self
+        """
+        result = self._execute('GETCONFIG')
+        if cache is not None and result and cache.restore(self, result):
+            return self
+        self.vds = []
+        self.arrays = []
+        self.enclosures = []
+        for title, body in runner.split_sections(result).items():
+            if not body:
+                continue
+            title = title.lower()
+            if title.startswith('controller'):
+                self.update(body)
+            elif title.startswith('array'):
+                self.get_arrays(body)
+            elif title.startswith('logical'):
+                self.get_vds(body)
+            elif title.startswith('physical'):
+                self.get_pds(body)
+        if cache is not None and result:
+            cache.store(self, result)
+        return self
+
+    def invalidate(self, *sections):
+        """Drop loaded attribute groups, they are loaded again on next access.
+
+        Args:
+            sections (str): any of SECTIONS, all of them if not given
+        """
+        sections = sections or SECTIONS
+        for section in sections:
+            if section not in SECTIONS:
+                raise ValueError(f'Unknown section {section}, expected one of {SECTIONS}')
+            self._loaded.discard(section)
+        if 'adapter' in sections:
+            for attr in self._adapter_attrs | {'facts'}:
+                self.__dict__.pop(attr, None)
+            self._adapter_attrs = set()
+        if 'pds' in sections:
+            self._drives = []
+            self._enclosures = []
+        for section in {'vds', 'arrays', 'tasks'} & set(sections):
+            setattr(self, '_' + section, [])
+        if 'connectors' in sections:
+            self._connectors = {}
+
+    def _load(self, section, loader):
+        """Call the loader of an attribute group if it was not loaded yet"""
+        if section not in self._loaded:
+            loader()
+            self._loaded.add(section)
+
+    @property
+    def adapter(self):
+        """Get the adapter info facts, the adapter info is loaded on first access in lazy mode"""
+        self._load('adapter', self.update)
+        return self.facts
+
     @property
     def drives(self):
-        if not self._drives:
-            self._drives = self.get_pds()
+        self._load('pds', self.get_pds)
         return self._drives
+
+    @property
+    def vds(self):
+        self._load('vds', self.get_vds)
+        return self._vds
+
+    @vds.setter
+    def vds(self, value):
+        self._vds = value
+
+    @property
+    def arrays(self):
+        self._load('arrays', self.get_arrays)
+        return self._arrays
+
+    @arrays.setter
+    def arrays(self, value):
+        self._arrays = value
+
+    @property
+    def enclosures(self):
+        self._load('pds', self.get_pds)
+        return self._enclosures
+
+    @enclosures.setter
+    def enclosures(self, value):
+        self._enclosures = value
+
+    @property
+    def tasks(self):
+        self._load('tasks', self.get_tasks)
+        return self._tasks
+
+    @tasks.setter
+    def tasks(self, value):
+        self._tasks = value
     
     @property
     def expanders(self):
@@ -120,24 +352,87 @@ class Controller():
         Return:
             bool: True if card is HBA
         """
+        self._load('adapter', self.update)
         return getattr(self, 'mode', '').upper() == 'HBA'
 
     @property
     def phyerrorcounters(self):
+        """
+        Return:
+            PhyCounters: controller PHY id -> {counter: int}
+        """
         result = self._execute('PHYERRORLOG')
-        result = runner.cut_lines(result, 8)
-        data = {}
-        for phy in result.split('\n\n'):
-            phy = phy.split('\n')
-            _, phyid = runner.convert_property(phy[0])
-            data[phyid] = {}
-            for attr in phy[1:]:
-                key, value = runner.convert_property(attr)
-                data[phyid][key] = value
-        return data
+        if not result:
+            return PhyCounters()
+        return parse_phyerrorlog(result)
+
+    def get_phy_errors(self, max_workers=8, controller_phys=True):
+        """Collect the PHY error counters of the controller and all its drives in one pass.
+        The PHYERRORLOG of every drive is a separate arcconf call, at most max_workers of them run at the same time.
+
+        Args:
+            max_workers (int): max number of arcconf processes at the same time
+            controller_phys (bool): include the controller PHYs
+        Returns:
+            PhyErrorTable: counters indexed by (channel, device, phy), drives are mapped by (channel, device)
+        """
+        drives = self.drives
+        cmds = self._phy_error_cmds(controller_phys, drives)
+        results = self.runner.run_many([self._args(cmd, args) for cmd, args in cmds], max_workers=max_workers,
+                                       universal_newlines=True)
+        return self._phy_error_table(controller_phys, drives, [(out, rc) for out, _, rc in results])
+
+    async def async_get_phy_errors(self, max_workers=8, controller_phys=True):
+        """Async version of get_phy_errors()"""
+        import asyncio
+        drives = self._drives or await self.async_get_pds()
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def _exec(cmd, args):
+            async with semaphore:
+                out, _, rc = await self.runner.run(args=self._args(cmd, args))
+                return out, rc
+
+        cmds = self._phy_error_cmds(controller_phys, drives)
+        results = await asyncio.gather(*[_exec(cmd, args) for cmd, args in cmds])
+        return self._phy_error_table(controller_phys, drives, results)
+
+    def _phy_error_cmds(self, controller_phys, drives):
+        """Get the PHYERRORLOG commands of get_phy_errors()
+
+        Args:
+            controller_phys (bool): include the controller command
+            drives (list): physical drives
+        Returns:
+            list: list of (cmd, args), the controller command first
+        """
+        cmds = [('PHYERRORLOG', [])] if controller_phys else []
+        return cmds + [('PHYERRORLOG', ['DEVICE', d.channel, d.device]) for d in drives]
+
+    def _phy_error_table(self, controller_phys, drives, results):
+        """Build the table of get_phy_errors() from the outputs of _phy_error_cmds()
+
+        Args:
+            controller_phys (bool): the first result is the controller output
+            drives (list): physical drives of the commands
+            results (list): list of (output, return code)
+        Returns:
+            PhyErrorTable: table
+        """
+        keys = ([(None, None)] if controller_phys else []) + [(d.channel, d.device) for d in drives]
+        counters = {}
+        for key, (out, rc) in zip(keys, results):
+            # rc 2: not supported by the device
+            if rc == 2 or not out:
+                continue
+            counters[key] = parse_phyerrorlog(runner.sanitize_stdout(out, 'Command '))
+        return PhyErrorTable.build(counters, {(d.channel, d.device): d for d in drives})
 
     @property
     def connectors(self):
+        """Get connectors info, it is memoized in lazy mode"""
+        if self.lazy and 'connectors' in self._loaded:
+            return self._connectors
         data = {}
         result = self._execute('GETCONFIG', ['CN'])
         result = runner.cut_lines(result, 4)
@@ -148,46 +443,64 @@ class Controller():
             for line in lines[1:]:
                 key, value = runner.convert_property(line)
                 data[cnid][key] = value
+        self._connectors = data
+        self._loaded.add('connectors')
         return data
 
-    def update(self):
-        """Parse controller info"""
-        result = self._execute('GETCONFIG', ['AD'])
-        result = runner.cut_lines(result, 4)
-        section = list(filter(None, result.split(runner.SEPARATOR_SECTION)))
+    @runner.single_flight
+    def update(self, config=None):
+        """Parse controller info
 
-        for line in section[0].split('\n'):
-            if runner.SEPARATOR_ATTRIBUTE in line:
-                key, value = runner.convert_property(line)
-                self.__setattr__(key, value)
-                
-                # pystorcli compliance
-                self.__setattr__(key.replace('controller_', ''), value)
-                key = runner.convert_key_dict(line)
-                # TODO: did not decide about naming, adding both. the second one is better for pystorcli
-                self.facts[key] = value
-                self.facts[key.replace('Controller ', '')] = value
-        if len(section) == 1:
-            return
-        for idx in range(1, len(section), 2):
-            if not section[idx].replace(' ', ''):
-                print('NO SECTION') # TODO: this print is only for debug, did not see this case, remove it later
-            attr = runner.convert_key_dict(section[idx])
-            # pystorcli compliance
-            attr = attr.replace('Information', '')
-            attr = attr.replace('Controller', '').strip()
-            if 'temperature sensors' in attr.lower():
-                props = {}
-                for sub_section in section[idx + 1].split('\n\n'):
-                    sub_props = runner.get_properties(sub_section)
-                    if sub_props:
-                        props[sub_props['Sensor ID']] = sub_props
+        Args:
+            config (str): GETCONFIG AD output without the header, queried if None
+        """
+        self._loaded.add('adapter')
+        self.__dict__.setdefault('facts', {})
+        known = set(self.__dict__)
+        lines = config.split('\n') if config is not None else itertools.islice(self._stream('GETCONFIG', ['AD']), 4, None)
+        title = None
+        props = {}
+        sub_section = ''
+        for section, subsection, key, value in runner.tokenize(lines):
+            if subsection is None:
+                self._set_section(title, props)
+                title, props, sub_section = section, {}, ''
+            elif title is None:
+                if key is not None:
+                    value = runner.convert_value_attribute(value)
+                    attr = runner.convert_key_attribute(key)
+                    self.__setattr__(attr, value)
+                    # pystorcli compliance
+                    self.__setattr__(attr.replace('controller_', ''), value)
+                    key = runner.convert_key_dict(key)
+                    # TODO: did not decide about naming, adding both. the second one is better for pystorcli
+                    self.facts[key] = value
+                    self.facts[key.replace('Controller ', '')] = value
+            elif 'temperature sensors' in title.lower():
+                if key is None:
+                    continue
+                if runner.convert_key_dict(key) == 'Sensor ID':
+                    sub_section = runner.convert_value_attribute(value)
+                if sub_section:
+                    runner.add_property(props, sub_section, key, value)
+            elif key is None:
+                sub_section = runner.convert_key_dict(subsection)
             else:
-                props = runner.get_properties(section[idx + 1])
-            if props:
-                self.__setattr__(runner.convert_key_attribute(attr), props)
-                # pystorcli compliance
-                self.facts[attr] = props
+                runner.add_property(props, sub_section, key, value)
+        self._set_section(title, props)
+        self._adapter_attrs |= set(self.__dict__) - known
+
+    def _set_section(self, title, props):
+        """Set a section of controller properties as an attribute"""
+        if title is None or not props:
+            return
+        attr = runner.convert_key_dict(title)
+        # pystorcli compliance
+        attr = attr.replace('Information', '')
+        attr = attr.replace('Controller', '').strip()
+        self.__setattr__(runner.convert_key_attribute(attr), props)
+        # pystorcli compliance
+        self.facts[attr] = props
 
     @property
     def lds(self):
@@ -196,16 +509,26 @@ class Controller():
     def get_lds(self):
         return self.get_vds()
 
-    def get_vds(self):
-        """Parse the info about logical drives."""
-        result = self._execute('GETCONFIG', ['LD'])
+    @runner.single_flight
+    def get_vds(self, config=None):
+        """Parse the info about logical drives.
+
+        Args:
+            config (str): GETCONFIG LD output without the header, queried if None
+        """
+        self._loaded.add('vds')
+        result = self._execute('GETCONFIG', ['LD']) if config is None else config
+        if not result:
+            # failed command
+            return []
         if 'not supported' in result:
             # HBA case
             return []
         if 'No logical devices configured' in result:
             return []
         self.vds = []
-        result = runner.cut_lines(result, 4)
+        if config is None:
+            result = runner.cut_lines(result, 4)
         for part in result.split('\n\n'):
             sections = part.split(runner.SEPARATOR_SECTION)
             options = sections[0]
@@ -216,16 +539,26 @@ class Controller():
             self.vds.append(ld)
         return self.vds
     
-    def get_arrays(self):
-        """Parse the info about drive arrays."""
-        result = self._execute('GETCONFIG', ['AR'])
+    @runner.single_flight
+    def get_arrays(self, config=None):
+        """Parse the info about drive arrays.
+
+        Args:
+            config (str): GETCONFIG AR output without the header, queried if None
+        """
+        self._loaded.add('arrays')
+        result = self._execute('GETCONFIG', ['AR']) if config is None else config
+        if not result:
+            # failed command
+            return []
         if 'not supported' in result:
             # HBA case
             return []
         if 'No arrays configured' in result:
             return []
         self.arrays = []
-        result = runner.cut_lines(result, 4)
+        if config is None:
+            result = runner.cut_lines(result, 4)
         for part in result.split('\n\n'):
             sections = part.split(runner.SEPARATOR_SECTION)
             options = sections[0]
@@ -236,64 +569,175 @@ class Controller():
             self.arrays.append(ld)
         return self.arrays
 
-    def get_pds(self):
+    @runner.single_flight
+    def get_pds(self, config=None):
         """Parse the info about physical drives.
+
+        Args:
+            config (str): GETCONFIG PD output without the header, queried if None
         """
+        self._loaded.add('pds')
         self._drives = []
-        result = self._execute('GETCONFIG', ['PD'])
-        result = runner.cut_lines(result, 4)
-        result = re.split('.*Channel #\d+:', result)
-        result = [re.split('.*Device #\d+\n', r) for r in result]
-        result = [item for sublist in result for item in sublist]
-        for part in result:
-            lines = [l.strip() for l in part.split('\n')]
-            lines = list(filter(None, lines))
-            if not lines:
-                continue
-            for l in lines:
-                if 'Channel,Device' in l:
-                    channel, device = l.split(': ')[1].split('(')[0].split(',')
-
-            if 'Device is a Hard drive' not in part:
-                # this is an expander\enclosure case
-                enc = Enclosure(self, channel, device)
-                self.enclosures.append(enc)
-                enc.update(lines)
+        self._enclosures = []
+        for channel, device, events in self._pd_events(config):
+            self._add_pd(channel, device, events)
+        return self._drives
+
+    @runner.single_flight
+    def refresh_pds(self, config=None):
+        """Incrementally refresh the physical drives.
+        Drives are matched with the ones of the previous call by (channel, device, serial),
+        matched drives are updated in place and only if their output changed.
+        Enclosures are parsed again.
+
+        Args:
+            config (str): GETCONFIG PD output without the header, queried if None
+        Return:
+            dict: 'added' and 'removed' lists of drives,
+                'changed' dict of drive -> {fact key: (old value, new value)}
+        Raises:
+            RuntimeError: if the command fails, the drives and enclosures are kept as they were
+        """
+        # the whole output is read before any drive is touched
+        devices = list(self._pd_events(config))
+        self._loaded.add('pds')
+        known = {(d.channel, d.device, d.serial): d for d in self._drives}
+        diff = {'added': [], 'removed': [], 'changed': {}}
+        drives = []
+        self._enclosures = []
+        for channel, device, events in devices:
+            hard_drive, channel, device, serial = self._pd_identity(channel, device, events)
+            if not hard_drive:
+                self._add_pd(channel, device, events)
                 continue
+            drive = known.pop((channel, device, serial), None)
+            if drive is None:
+                drive = PhysicalDrive(self, channel, device)
+                drive.reload(events)
+                diff['added'].append(drive)
+            else:
+                changes = drive.reload(events)
+                if changes:
+                    diff['changed'][drive] = changes
+            drives.append(drive)
+        diff['removed'] = list(known.values())
+        self._drives = drives
+        return diff
 
-            drive = PhysicalDrive(self, channel, device)
-            drive.update(lines)
-            self._drives.append(drive)
-        return self._drives
+    def _pd_events(self, config=None):
+        """Split a GETCONFIG PD output into the parse events of each device
+
+        Args:
+            config (str): GETCONFIG PD output without the header, queried if None
+        Returns:
+            iterator: (channel, device, runner.tokenize() events of the device) tuples
+        """
+        lines = config.split('\n') if config is not None else self._stream('GETCONFIG', ['PD'])
+        channel = ''
+        device = None
+        events = []
+        for event in runner.tokenize(lines):
+            _, subsection, key, _ = event
+            header = key is None and subsection and PD_HEADER.match(subsection)
+            if header:
+                if device is not None:
+                    yield channel, device, events
+                device, events = None, []
+                if header.group(1) == 'Channel':
+                    channel = header.group(2)
+                else:
+                    device = header.group(2)
+            elif device is not None:
+                events.append(event)
+        if device is not None:
+            yield channel, device, events
+
+    def _pd_identity(self, channel, device, events):
+        """Get the identity of a device from its parse events
+
+        Args:
+            channel (str): channel number
+            device (str): device number
+            events (list): runner.tokenize() events of the device
+        Returns:
+            tuple: (is a hard drive, channel, device, serial number)
+        """
+        hard_drive = False
+        serial = ''
+        for _, subsection, key, value in events:
+            if key is None:
+                hard_drive = hard_drive or subsection == 'Device is a Hard drive'
+            elif 'Channel,Device' in key:
+                channel, device = value.split('(')[0].split(',')
+            elif key == 'Serial number':
+                serial = runner.convert_value_attribute(value)
+        return hard_drive, channel.strip(), device.strip(), serial
+
+    def _add_pd(self, channel, device, events):
+        """Create a physical drive or an enclosure from its parse events
 
-    def get_tasks(self):
-        """Parse the tasks."""
-        result = self._execute('GETSTATUS')
+        Args:
+            channel (str): channel number
+            device (str): device number
+            events (list): runner.tokenize() events of the device
+        """
+        hard_drive, channel, device, _ = self._pd_identity(channel, device, events)
+        if not hard_drive:
+            # this is an expander\enclosure case
+            enc = Enclosure(self, channel, device)
+            self._enclosures.append(enc)
+            enc.load(events)
+            return
+        drive = PhysicalDrive(self, channel, device)
+        drive.load(events)
+        self._drives.append(drive)
+
+    def get_pds_by_serial(self):
+        """Refresh the physical drives in place and index them by serial number.
+        The drive objects already held by the callers are kept, see refresh_pds().
+
+        Return:
+            dict: serial number -> PhysicalDrive
+        """
+        self.refresh_pds()
+        return {d.serial: d for d in self._drives}
+
+    @runner.single_flight
+    def get_tasks(self, config=None):
+        """Parse the tasks.
+
+        Args:
+            config (str): GETSTATUS output without the header, queried if None
+        """
+        self._loaded.add('tasks')
+        result = runner.cut_lines(self._execute('GETSTATUS'), 1) if config is None else config
+        self.tasks = []
         if 'Current operation              : None' in result:
             return []
-        self.tasks = []
-        result = runner.cut_lines(result, 1)
-        for part in result.split('\n\n'):
-            task = Task()
-            for line in part.split('\n')[1:]:
-                key, value = runner.convert_property(line)
-                task.__setattr__(key, value)
-            self.tasks.append(task)
+        task = None
+        for _, _, key, value in runner.tokenize(result.split('\n')):
+            if key is None:
+                # a task header like 'Logical device Task:'
+                task = Task()
+                self.tasks.append(task)
+            elif task is not None:
+                task.__setattr__(runner.convert_key_attribute(key), runner.convert_value_attribute(value))
         return self.tasks
 
-    def get_logs(self, log_type='EVENT', args=None):
+    def get_logs(self, log_type='EVENT', args=None, config=None):
         """ GETLOGS command
         Args:
             log_type (str): One of: DEVICE,DEAD,EVENT,STATS,CACHE
             args (list): list of additional args
+            config (str): GETLOGS output without the header, queried if None
         Return:
             dict: dict of events
         """
         args = list(args) if args else []
-        result = self._execute('GETLOGS', [log_type] + args)
-        if 'not supported' in result:
+        result = runner.cut_lines(self._execute('GETLOGS', [log_type] + args), 1) if config is None else config
+        if not result or 'not supported' in result:
             return {}
-        result = ''.join(result.split('\n')[1:])
+        result = ''.join(result.split('\n'))
         import xml.etree.ElementTree as ET
         logs = ET.fromstring(result)
         ev = {}
@@ -301,6 +745,58 @@ class Controller():
             ev[child.tag] = child.attrib
         return ev
 
+    def iter_logs(self, log_type='EVENT', args=None, state_file=None):
+        """Stream every GETLOGS record, unlike get_logs() records with the same tag are all kept.
+
+        Args:
+            log_type (str): One of: DEVICE,DEAD,EVENT,STATS,CACHE
+            args (list): list of additional args
+            state_file (str): json file of the high-water marks, only records newer than
+                the ones returned by previous calls are returned if given
+        Return:
+            iterator: record dicts, see logs.LogReader.records()
+        """
+        from .logs import LogReader
+        return LogReader(self, log_type, args, state_file).read()
+
+    async def async_update(self):
+        """Async version of update()"""
+        result = await self._async_execute('GETCONFIG', ['AD'])
+        if not result:
+            # failed command, the adapter info is kept
+            return
+        self.update(runner.cut_lines(result, 4))
+
+    async def async_get_pds(self):
+        """Async version of get_pds()"""
+        result = await self._async_execute('GETCONFIG', ['PD'])
+        return self.get_pds(runner.cut_lines(result, 4))
+
+    async def async_refresh_pds(self):
+        """Async version of refresh_pds()"""
+        result, rc = await self._async_exec('GETCONFIG', ['PD'])
+        if rc:
+            raise RuntimeError(f'{self._args("GETCONFIG", ["PD"])} failed with return code {rc}')
+        return self.refresh_pds(runner.cut_lines(result, 4))
+
+    async def async_get_vds(self):
+        """Async version of get_vds()"""
+        result = await self._async_execute('GETCONFIG', ['LD'])
+        if 'not supported' in result or 'No logical devices configured' in result:
+            return []
+        return self.get_vds(runner.cut_lines(result, 4))
+
+    async def async_get_tasks(self):
+        """Async version of get_tasks()"""
+        result = await self._async_execute('GETSTATUS')
+        return self.get_tasks(runner.cut_lines(result, 1))
+
+    async def async_get_logs(self, log_type='EVENT', args=None):
+        """Async version of get_logs()"""
+        args = list(args) if args else []
+        result = await self._async_execute('GETLOGS', [log_type] + args)
+        return self.get_logs(log_type, args, runner.cut_lines(result, 1))
+
     def set_config(self):
         """Reset controller to default settings, removes all LDs"""
         result = self._execute('SETCONFIG', ['default'])
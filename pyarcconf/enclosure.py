@@ -46,6 +46,8 @@ class Enclosure(PhysicalDrive):
       Status of Enclosure Services Device
          Speaker status                    : Not Available
    """
+   __slots__ = ()
+
    #TODO: this method is not really needed for now
    def _execute(self, cmd, args=[]):
       """Execute a command
@@ -0,0 +1,267 @@
+"""Prometheus exporter of the arcconf controllers of a host.
+
+A background thread refreshes the controllers on a fixed interval and renders the metrics
+in the Prometheus text format. The rendered snapshot is swapped in a single assignment,
+scrapes are served from it, so a scrape never runs arcconf and concurrent scrapes share one refresh.
+
+Usage:
+    python -m pyarcconf.exporter [--port 9587] [--interval 60] [--no-phy-errors]
+
+Example:
+    exporter = Exporter(cmdrunner, interval=60)
+    exporter.start()
+    exporter.serve(port=9587)
+"""
+import argparse
+import logging
+import threading
+import time
+
+from . import runner
+from .watcher import celsius
+
+logger = logging.getLogger(__name__)
+
+# metric name -> (type, help)
+METRICS = {
+    'arcconf_controller_info': ('gauge', 'Controller model, serial, firmware and mode'),
+    'arcconf_controller_status': ('gauge', 'Controller status, 1 for the current status'),
+    'arcconf_controller_temperature_celsius': ('gauge', 'Controller temperature'),
+    'arcconf_controller_sensor_temperature_celsius': ('gauge', 'Controller temperature sensor value'),
+    'arcconf_pd_state': ('gauge', 'Physical drive state, 1 for the current state'),
+    'arcconf_pd_temperature_celsius': ('gauge', 'Physical drive current temperature'),
+    'arcconf_pd_phy_errors': ('gauge', 'Physical drive PHY error counter'),
+    'arcconf_ld_status': ('gauge', 'Logical device status, 1 for the current status'),
+    'arcconf_ld_optimal': ('gauge', 'Logical device status is Optimal'),
+    'arcconf_task_percent_complete': ('gauge', 'Percentage complete of a controller task'),
+    'arcconf_collect_errors_total': ('counter', 'Failed collections of a controller section'),
+    'arcconf_refresh_duration_seconds': ('gauge', 'Duration of the last refresh'),
+    'arcconf_last_refresh_timestamp_seconds': ('gauge', 'Time of the last refresh'),
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def escape(value):
+    """Escape a label value of the text format"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render(samples):
+    """Render samples in the Prometheus text format.
+
+    Args:
+        samples (list): list of (metric name, labels dict, value)
+    Returns:
+        bytes: metrics text
+    """
+    metrics = {}
+    for name, labels, value in samples:
+        metrics.setdefault(name, []).append((labels, value))
+    lines = []
+    for name, values in metrics.items():
+        type_, help_ = METRICS.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {help_}')
+        lines.append(f'# TYPE {name} {type_}')
+        for labels, value in values:
+            labels = ','.join(f'{key}="{escape(val)}"' for key, val in labels.items())
+            lines.append(f'{name}{{{labels}}} {value}' if labels else f'{name} {value}')
+    return ('\n'.join(lines) + '\n').encode('utf8')
+
+
+def to_number(value):
+    """Get a metric value of a parsed counter, None if it is not a number"""
+    if type(value) in (int, float):
+        return value
+    try:
+        # decimal only, hex values are addresses
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+class Exporter():
+    """Refresh the controllers in the background and serve the last rendered metrics."""
+
+    def __init__(self, cmdrunner=None, controllers=None, interval=60, phy_errors=True):
+        """Initialize a new exporter.
+
+        Args:
+            cmdrunner: runner object to discover the controllers with
+            controllers (list): controller objects, discovered on the first refresh if not given
+            interval (int): seconds between the refreshes
+            phy_errors (bool): collect the PHY error counters of the drives, one arcconf call per drive,
+                see Controller.get_phy_errors()
+        """
+        self.runner = cmdrunner
+        self.controllers = controllers
+        self.interval = interval
+        self.phy_errors = phy_errors
+        # (controller id, section) -> number of failed collections
+        self.errors = {}
+        self.snapshot = render([])
+        self.updated = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    def refresh(self):
+        """Collect the metrics of all controllers and swap the snapshot
+
+        Returns:
+            bytes: new snapshot
+        """
+        start = time.time()
+        if not self.controllers:
+            from .controller import get_controllers
+            self.controllers = get_controllers(self.runner or runner.CMDRunner('arcconf'), lazy=True)
+        samples = []
+        for ctrl in self.controllers:
+            self._collect_controller(ctrl, samples)
+        for (controller_id, section), count in sorted(self.errors.items()):
+            samples.append(('arcconf_collect_errors_total', {'controller': controller_id, 'section': section}, count))
+        self.updated = time.time()
+        samples.append(('arcconf_refresh_duration_seconds', {}, round(self.updated - start, 6)))
+        samples.append(('arcconf_last_refresh_timestamp_seconds', {}, round(self.updated, 3)))
+        # readers get either the old or the new snapshot, never a partial one
+        self.snapshot = render(samples)
+        return self.snapshot
+
+    def _collect_controller(self, ctrl, samples):
+        labels = {'controller': str(ctrl.id)}
+        for section in ('adapter', 'pds', 'vds', 'tasks'):
+            try:
+                getattr(self, f'_collect_{section}')(ctrl, labels, samples)
+            except Exception as e:
+                logger.warning('Controller %s %s collection failed: %r', ctrl.id, section, e)
+                key = (str(ctrl.id), section)
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def _collect_adapter(self, ctrl, labels, samples):
+        ctrl.update()
+        samples.append(('arcconf_controller_info', dict(
+            labels,
+            model=getattr(ctrl, 'controller_model', ''),
+            serial=getattr(ctrl, 'controller_serial_number', ''),
+            firmware=getattr(ctrl, 'version', {}).get('Firmware', ''),
+            mode=getattr(ctrl, 'controller_mode', ''),
+        ), 1))
+        samples.append(('arcconf_controller_status', dict(labels, status=getattr(ctrl, 'controller_status', '')), 1))
+        value = celsius(getattr(ctrl, 'temperature', ''))
+        if value is not None:
+            samples.append(('arcconf_controller_temperature_celsius', labels, value))
+        for sensor_id, sensor in getattr(ctrl, 'temperature_sensors', {}).items():
+            value = celsius(sensor.get('Current Value', ''))
+            if value is not None:
+                samples.append(('arcconf_controller_sensor_temperature_celsius',
+                                dict(labels, sensor=sensor_id, location=sensor.get('Location', '')), value))
+
+    def _collect_pds(self, ctrl, labels, samples):
+        ctrl.refresh_pds()
+        for drive in ctrl._drives:
+            drive_labels = dict(labels, channel=drive.channel, device=drive.device, serial=drive.serial)
+            samples.append(('arcconf_pd_state', dict(drive_labels, state=getattr(drive, 'state', '')), 1))
+            value = celsius(getattr(drive, 'current_temperature', ''))
+            if value is not None:
+                samples.append(('arcconf_pd_temperature_celsius', drive_labels, value))
+        if not self.phy_errors:
+            return
+        table = ctrl.get_phy_errors(controller_phys=False)
+        for (channel, device, phy), counters in table.items():
+            drive = table.drives[(channel, device)]
+            drive_labels = dict(labels, channel=channel, device=device, serial=drive.serial)
+            for counter, value in counters.items():
+                samples.append(('arcconf_pd_phy_errors', dict(drive_labels, phy=phy, counter=counter), value))
+
+    def _collect_vds(self, ctrl, labels, samples):
+        for ld in ctrl.get_vds():
+            status = getattr(ld, 'status_of_logical_device', '')
+            ld_labels = dict(labels, ld=ld.id, name=ld.name)
+            samples.append(('arcconf_ld_status', dict(ld_labels, status=status), 1))
+            samples.append(('arcconf_ld_optimal', ld_labels, int(status == 'Optimal')))
+
+    def _collect_tasks(self, ctrl, labels, samples):
+        for task in ctrl.get_tasks():
+            value = to_number(task.percentage_complete)
+            if value is None:
+                continue
+            samples.append(('arcconf_task_percent_complete', dict(
+                labels, ld=task.logical_device, task=task.task_id, operation=task.current_operation or ''), value))
+
+    def start(self):
+        """Start the background refresher, the first refresh runs right away"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='pyarcconf-exporter', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            start = time.time()
+            try:
+                self.refresh()
+            except Exception as e:
+                # e.g. no arcconf, the previous snapshot is served meanwhile
+                logger.error('Refresh failed: %r', e)
+            # fixed interval, a slow refresh does not shift the schedule
+            if self._stop.wait(max(0, self.interval - (time.time() - start))):
+                return
+
+    def serve(self, address='', port=9587, background=False):
+        """Serve the snapshot on /metrics
+
+        Args:
+            address (str): listen address, all interfaces if empty
+            port (int): listen port
+            background (bool): serve from a thread and return
+        Returns:
+            ThreadingHTTPServer: the server
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = exporter.snapshot
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((address, port), Handler)
+        self._server.daemon_threads = True
+        if background:
+            threading.Thread(target=self._server.serve_forever, name='pyarcconf-exporter-http', daemon=True).start()
+        else:
+            self._server.serve_forever()
+        return self._server
+
+    def stop(self):
+        """Stop the refresher and the server"""
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Prometheus exporter of the arcconf controllers')
+    parser.add_argument('--address', default='', help='listen address')
+    parser.add_argument('--port', type=int, default=9587, help='listen port')
+    parser.add_argument('--interval', type=int, default=60, help='seconds between the refreshes')
+    parser.add_argument('--arcconf', default='arcconf', help='arcconf binary')
+    parser.add_argument('--no-phy-errors', action='store_true', help='do not collect the PHY error counters')
+    args = parser.parse_args()
+    logging.basicConfig(format='%(asctime)s %(levelname)s %(message)s')
+    exporter = Exporter(runner.CMDRunner(args.arcconf), interval=args.interval, phy_errors=not args.no_phy_errors)
+    exporter.start()
+    exporter.serve(args.address, args.port)
@@ -0,0 +1,205 @@
+"""Compact storage of parsed facts.
+
+Objects which exist in large numbers (drives, enclosures) keep their parsed properties
+in a list of values indexed by a key table shared by all objects of the class,
+instead of an instance dict plus a facts dict holding the same values twice.
+"""
+import threading
+from collections.abc import MutableMapping
+from sys import intern
+
+MISSING = object()
+
+_lock = threading.Lock()
+
+
+class FactsView(MutableMapping):
+    """pystorcli compliant facts dict, a view over the values of a FactsObject"""
+
+    __slots__ = ('_obj',)
+
+    def __init__(self, obj):
+        self._obj = obj
+
+    def __getitem__(self, key):
+        value = self._obj._get_fact(self._obj._keys.get(key))
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._obj._set_fact(key, None, value)
+
+    def __delitem__(self, key):
+        idx = self._obj._keys.get(key)
+        if self._obj._get_fact(idx) is MISSING:
+            raise KeyError(key)
+        self._obj._values[idx] = MISSING
+
+    def __iter__(self):
+        values = self._obj._values
+        for key, idx in list(self._obj._keys.items()):
+            if idx < len(values) and values[idx] is not MISSING:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class FactsObject():
+    """Base class of objects which keep parsed facts in the shared key table of their class.
+
+    Every fact has a dict key (as in facts) and an attribute name, both are served
+    from the same value. Attributes which are not slots are stored as facts too.
+    """
+
+    __slots__ = ('_values',)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # fact key -> index of the value
+        cls._keys = {}
+        # attribute name -> indexes of the values, several keys can have the same attribute name
+        cls._attrs = {}
+        # index -> (fact key, attribute name)
+        cls._fields = []
+
+    def __init__(self):
+        # sized for the known keys, so setting a fact rarely grows the list
+        self._values = [MISSING] * len(self._fields)
+
+    @classmethod
+    def _index(cls, key, attr):
+        """Get the value index of a fact, registering it in the key table if it is new"""
+        with _lock:
+            if key is None:
+                idx = next((idx for idx in cls._attrs.get(attr, ()) if cls._fields[idx][0] is None), None)
+            else:
+                idx = cls._keys.get(key)
+            if idx is None:
+                idx = len(cls._fields)
+                cls._fields.append((key, attr))
+                if key is not None:
+                    cls._keys[key] = idx
+                if attr is not None:
+                    cls._attrs.setdefault(attr, []).append(idx)
+            return idx
+
+    def _get_fact(self, idx):
+        """Get the value at an index of the key table"""
+        if idx is None or idx >= len(self._values):
+            return MISSING
+        return self._values[idx]
+
+    def _set_fact(self, key, attr, value):
+        """Set a fact.
+
+        Args:
+            key (str): key in facts, None if the value is an attribute only
+            attr (str): attribute name, None if the value is a facts key only
+            value: value, short strings are interned since they repeat across objects
+        """
+        idx = self._keys.get(key)
+        if idx is None:
+            idx = self._index(key, attr)
+        if type(value) == str and len(value) < 64:
+            value = intern(value)
+        values = self._values
+        if idx < len(values):
+            values[idx] = value
+        else:
+            self._store(idx, value)
+
+    def _store(self, idx, value):
+        """Set the value at an index of the key table"""
+        if type(value) == str and len(value) < 64:
+            value = intern(value)
+        values = self._values
+        if idx >= len(values):
+            values.extend([MISSING] * (idx + 1 - len(values)))
+        values[idx] = value
+
+    def __getattr__(self, name):
+        if name == '_values':
+            raise AttributeError(name)
+        for idx in reversed(self._attrs.get(name, ())):
+            value = self._get_fact(idx)
+            if value is not MISSING:
+                return value
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __setattr__(self, name, value):
+        try:
+            object.__setattr__(self, name, value)
+            return
+        except AttributeError:
+            pass
+        indexes = self._attrs.get(name) or [self._index(None, name)]
+        present = [idx for idx in indexes if self._get_fact(idx) is not MISSING]
+        for idx in present or indexes[-1:]:
+            self._store(idx, value)
+
+    def __delattr__(self, name):
+        indexes = [idx for idx in self._attrs.get(name, ()) if self._get_fact(idx) is not MISSING]
+        if not indexes:
+            object.__delattr__(self, name)
+        for idx in indexes:
+            self._values[idx] = MISSING
+
+    def __dir__(self):
+        attrs = [attr for idx, (_, attr) in enumerate(self._fields) if attr and self._get_fact(idx) is not MISSING]
+        return sorted(set(super().__dir__()) | set(attrs))
+
+    def _merge(self, other):
+        """Copy the changed facts of another object of the same class.
+
+        Args:
+            other (FactsObject): object with the new facts
+        Returns:
+            dict: fact key (attribute name for attribute only values) -> (old value, new value),
+                None is the value of a missing fact
+        """
+        changes = {}
+        for idx in range(max(len(self._values), len(other._values))):
+            old = self._get_fact(idx)
+            new = other._get_fact(idx)
+            if old is new or old == new:
+                continue
+            key, attr = self._fields[idx]
+            changes[key if key is not None else attr] = (
+                None if old is MISSING else old, None if new is MISSING else new)
+            self._store(idx, new)
+        return changes
+
+    @property
+    def facts(self):
+        """pystorcli compliance"""
+        return FactsView(self)
+
+    def _slots(self):
+        """Names of the slots of the object"""
+        for cls in type(self).__mro__:
+            yield from getattr(cls, '__slots__', ())
+
+    def __getstate__(self):
+        # indexes differ between processes, so the facts are pickled with their keys
+        state = {name: getattr(self, name) for name in self._slots() if name != '_values' and hasattr(self, name)}
+        state['_facts'] = [self._fields[idx] + (value,) for idx, value in enumerate(self._values) if value is not MISSING]
+        return state
+
+    def __setstate__(self, state):
+        facts = state.pop('_facts', [])
+        keys = self._keys
+        indexes = [keys.get(key) if key is not None else None for key, _, _ in facts]
+        for pos, (key, attr, _) in enumerate(facts):
+            if indexes[pos] is None:
+                indexes[pos] = self._index(key, attr)
+        # strings shared by the pickled objects are loaded as shared objects, no interning needed
+        values = self._values = [MISSING] * len(self._fields)
+        for idx, (_, _, value) in zip(indexes, facts):
+            values[idx] = value
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
@@ -0,0 +1,247 @@
+"""Vendor neutral inventory of the arcconf (Adaptec) and mvcli (Marvell) controllers of a host.
+
+The binaries are probed once, the controllers of both vendors are discovered concurrently
+and returned in one normalized schema.
+
+Example:
+    inventory = Inventory()
+    for ctrl in inventory.collect():
+        print(ctrl.vendor, ctrl.model, len(ctrl.pds))
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from . import runner
+
+logger = logging.getLogger(__name__)
+
+# vendor -> CLI binary
+BINARIES = {
+    'arcconf': 'arcconf',
+    'mvcli': 'mvcli',
+}
+
+# mvcli sizes are printed in binary units like '117220824 K'
+MVCLI_SIZE_UNITS = {'B': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+@dataclass
+class DriveInfo:
+    """Physical drive of the inventory, id is 'channel,device' for arcconf and the PD id for mvcli"""
+    id: str
+    model: str = ''
+    serial: str = ''
+    firmware: str = ''
+    size: Optional[int] = None
+    state: str = ''
+    ssd: Optional[bool] = None
+
+
+@dataclass
+class VolumeInfo:
+    """Logical device of the inventory, raid is like 'raid1'"""
+    id: str
+    name: str = ''
+    raid: str = ''
+    size: Optional[int] = None
+    status: str = ''
+
+
+@dataclass
+class TaskInfo:
+    """Background task of the inventory, target is the logical device id"""
+    id: str
+    target: str = ''
+    operation: str = ''
+    status: str = ''
+    percent: Optional[int] = None
+
+
+@dataclass
+class ControllerInfo:
+    """Controller of the inventory, controller is the vendor controller object"""
+    vendor: str
+    id: str
+    model: str = ''
+    serial: str = ''
+    firmware: str = ''
+    mode: str = ''
+    status: str = ''
+    pds: List[DriveInfo] = field(default_factory=list)
+    vds: List[VolumeInfo] = field(default_factory=list)
+    tasks: List[TaskInfo] = field(default_factory=list)
+    controller: object = field(default=None, repr=False, compare=False)
+
+
+def probe(binaries=None):
+    """Find the paths of the vendor binaries.
+
+    Args:
+        binaries (dict): vendor -> binary name or path, BINARIES if not given
+    Returns:
+        dict: vendor -> full binary path, None if it is not installed
+    """
+    binaries = BINARIES if binaries is None else binaries
+    return {vendor: runner.which(binary) for vendor, binary in binaries.items()}
+
+
+def to_int(value):
+    """Get an int of a parsed value, None if it is not a number"""
+    if type(value) == int:
+        return value
+    try:
+        return int(str(value).strip().rstrip('%'))
+    except ValueError:
+        return None
+
+
+def mvcli_size(value):
+    """Convert an mvcli size like '228818 M' to bytes
+
+    Args:
+        value (str): size value
+    Returns:
+        int: bytes, None if the value is not a size
+    """
+    parts = str(value).split()
+    if len(parts) != 2 or parts[1].upper() not in MVCLI_SIZE_UNITS:
+        return None
+    number = to_int(parts[0])
+    return None if number is None else number * MVCLI_SIZE_UNITS[parts[1].upper()]
+
+
+class Inventory():
+    """Host level inventory of the controllers of both vendors.
+
+    The binary paths are probed on init and kept, a vendor whose binary is not installed is skipped.
+    """
+
+    def __init__(self, runners=None, binaries=None, max_workers=8):
+        """Initialize a new inventory.
+
+        Args:
+            runners (dict): vendor -> runner object, a CMDRunner of the probed binary is created if not given
+            binaries (dict): vendor -> binary name or path, see probe()
+            max_workers (int): max number of arcconf controllers queried at the same time,
+                mvcli controllers are queried one at a time
+        """
+        runners = runners or {}
+        self.max_workers = max_workers
+        self.binaries = probe({vendor: binary for vendor, binary in (binaries or BINARIES).items() if vendor not in runners})
+        self.runners = dict(runners)
+        for vendor, path in self.binaries.items():
+            if path:
+                self.runners[vendor] = runner.CMDRunner(path)
+        # vendor -> exception of the last failed discovery
+        self.errors = {}
+
+    def collect(self):
+        """Discover the controllers of all vendors concurrently and normalize them.
+
+        Returns:
+            list: list of ControllerInfo objects, arcconf controllers first
+        """
+        self.errors = {}
+        vendors = [vendor for vendor in BINARIES if vendor in self.runners]
+        if not vendors:
+            return []
+        with ThreadPoolExecutor(max_workers=len(vendors)) as pool:
+            results = list(pool.map(self._collect_vendor, vendors))
+        return [ctrl for controllers in results for ctrl in controllers]
+
+    def _collect_vendor(self, vendor):
+        """Discover and normalize the controllers of a vendor, a failed vendor is recorded in errors"""
+        try:
+            controllers = getattr(self, f'_discover_{vendor}')(self.runners[vendor])
+            if not controllers:
+                return []
+            # mvcli keeps the selected adapter as CLI state, so the controllers sharing its runner go one at a time
+            workers = 1 if vendor == 'mvcli' else min(self.max_workers, len(controllers))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(getattr(self, f'_normalize_{vendor}'), controllers))
+        except Exception as e:
+            logger.warning('%s inventory failed: %r', vendor, e)
+            self.errors[vendor] = e
+            return []
+
+    @staticmethod
+    def _discover_arcconf(cmdrunner):
+        from .controller import get_controllers
+        return get_controllers(cmdrunner, lazy=True)
+
+    @staticmethod
+    def _discover_mvcli(cmdrunner):
+        from .mvcli import get_controllers
+        return get_controllers(cmdrunner)
+
+    @staticmethod
+    def _normalize_arcconf(ctrl):
+        """Build the inventory record of an arcconf controller"""
+        ctrl.update()
+        pds = [DriveInfo(
+            id=f'{pd.channel},{pd.device}',
+            model=getattr(pd, 'model', ''),
+            serial=pd.serial,
+            firmware=getattr(pd, 'firmware', ''),
+            size=to_int(pd.size),
+            state=getattr(pd, 'state', ''),
+            ssd=getattr(pd, 'ssd', None),
+        ) for pd in ctrl.get_pds()]
+        vds = [VolumeInfo(
+            id=str(ld.id),
+            name=ld.name,
+            raid=ld.raid,
+            size=to_int(getattr(ld, 'size', None)),
+            status=getattr(ld, 'status_of_logical_device', ''),
+        ) for ld in ctrl.get_vds()]
+        tasks = [TaskInfo(
+            id=str(task.task_id),
+            target=str(task.logical_device),
+            operation=task.current_operation or '',
+            status=task.status or '',
+            percent=to_int(task.percentage_complete),
+        ) for task in ctrl.get_tasks()]
+        return ControllerInfo(
+            vendor='arcconf',
+            id=str(ctrl.id),
+            model=getattr(ctrl, 'controller_model', ''),
+            serial=getattr(ctrl, 'controller_serial_number', ''),
+            firmware=getattr(ctrl, 'version', {}).get('Firmware', ''),
+            mode=getattr(ctrl, 'controller_mode', ''),
+            status=getattr(ctrl, 'controller_status', ''),
+            pds=pds,
+            vds=vds,
+            tasks=tasks,
+            controller=ctrl,
+        )
+
+    @staticmethod
+    def _normalize_mvcli(ctrl):
+        """Build the inventory record of an mvcli controller, mvcli has no task and drive state info"""
+        pds = [DriveInfo(
+            id=drive.id,
+            model=getattr(drive, 'model', ''),
+            serial=getattr(drive, 'serial', ''),
+            firmware=getattr(drive, 'firmware_version', ''),
+            size=mvcli_size(getattr(drive, 'size', '')),
+            ssd=getattr(drive, 'ssd_type', '') == 'SSD' if hasattr(drive, 'ssd_type') else None,
+        ) for drive in ctrl.get_pds()]
+        vds = [VolumeInfo(
+            id=drive.id,
+            name=getattr(drive, 'name', ''),
+            raid=drive.raid.lower(),
+            size=mvcli_size(getattr(drive, 'size', '')),
+            status=getattr(drive, 'status', ''),
+        ) for drive in ctrl.get_vds()]
+        return ControllerInfo(
+            vendor='mvcli',
+            id=str(ctrl.id),
+            model=ctrl.model,
+            firmware=getattr(ctrl, 'firmware_version', ''),
+            mode='HBA' if ctrl.hba else 'RAID',
+            pds=pds,
+            vds=vds,
+            controller=ctrl,
+        )
@@ -1,18 +1,21 @@
+import itertools
+
 from . import runner
+from .facts import FactsObject
 
 
-class LogicalDrive():
+class LogicalDrive(FactsObject):
     """Object which represents a logical drive."""
 
+    __slots__ = ('controller', 'id', 'segments')
+
     def __init__(self, controller_obj, id_):
         """Initialize a new object."""
+        super().__init__()
         self.controller = controller_obj
         self.id = str(id_)
         self.segments = []
 
-        # pystorcli compliance
-        self.facts = {}
-
     def __repr__(self):
         """Define a basic representation of the class object."""
         return '<LD {} | {} {} Segments: {}>'.format(self.id, self.raid, self.capacity, self.segments)
@@ -35,54 +38,41 @@ class LogicalDrive():
         return result
 
     def update(self, config=''):
+        """Parse the logical drive info
+
+        Args:
+            config (str|list): GETCONFIG LD output without the header, queried if not given
+        """
         if config and type(config) == list:
-            config = '\n'.join(config)
-        section = config or self._get_config()
-        section = section.split(runner.SEPARATOR_SECTION)
-        for line in section[0].split('\n'):
-            if runner.SEPARATOR_ATTRIBUTE in line:
-                key, value = runner.convert_property(line)
-                self.__setattr__(key, value)
-                # pystorcli compliance
-                key = runner.convert_key_dict(line)
-                self.facts[key] = value
-        if len(section) == 1:
-            return
-        self.segments = []
-        for idx in range(1, len(section), 1):
-            header = section[idx]
-            if 'Logical Device segment information' not in header:
+            lines = config
+        elif config:
+            lines = config.split('\n')
+        else:
+            lines = itertools.islice(self.controller._stream('GETCONFIG', ['LD', self.id]), 4, None)
+        title = None
+        for section, subsection, key, value in runner.tokenize(lines):
+            if subsection is None:
+                title = section
+                if 'segment information' in title.lower():
+                    self.segments = []
+            elif key is None:
                 continue
-            # skipping other sections since they are parsed in self.drives
-            segments = section[idx + 1]
-            for line in list(filter(None, segments.split('\n'))):
-                line = ':'.join(line.split(':')[1:])
-                state = line.split()[0].strip()
-                serial = line.split(')')[-1].strip()
-                props = line.split('(')[1].split(')')[0].split(',')
-                if len(props) == 5:
-                    enclosure = None
-                    size, protocol, type_, channel, slot = props
-                else:
-                    size, protocol, type_, channel, enclosure, slot = props
-                channel = channel.split(':')[1]
-                slot = slot.split(':')[1]
-                self.segments.append(LogicalDriveSegment(channel, slot, state, serial, protocol, type_, size, enclosure))
+            elif title is None:
+                value = runner.convert_value_attribute(value)
+                # pystorcli compliance
+                self._set_fact(runner.convert_key_dict(key), runner.convert_key_attribute(key), value)
+            elif 'segment information' in title.lower() and key != 'Segment':
+                # skipping other sections since they are parsed in self.drives
+                self.segments.append(LogicalDriveSegment.from_value(value))
 
     @property
     def drives(self):
         config = self._get_config()
         config = config.split(runner.SEPARATOR_SECTION)[-1]
-        drives = []
-        for line in config.split('\n'):
-            if line:
-                serial = line.split(')')[1].strip()
-                # TODO: create new objects instead of getting them from the controller ?
-                for d in self.controller.drives:
-                    if serial == d.serial:
-                        d.update()
-                        drives.append(d)
-        return drives
+        serials = [line.split(')')[1].strip() for line in config.split('\n') if line]
+        # all member drives are refreshed by a single GETCONFIG PD call
+        drives = self.controller.get_pds_by_serial()
+        return [drives[serial] for serial in serials if serial in drives]
 
     # pystorcli compliance
     @property
@@ -150,6 +140,8 @@ class LogicalDrive():
 class LogicalDriveSegment():
     """Object which represents a logical drive segment."""
 
+    __slots__ = ('channel', 'port', 'state', 'serial', 'protocol', 'type', 'size', 'enclosure')
+
     def __init__(self, channel, port, state, serial, protocol, type_, size, enclosure=None):
         """Initialize a new PhysicalDrive object."""
         self.channel = channel
@@ -164,3 +156,28 @@ class LogicalDriveSegment():
     def __repr__(self):
         """Build a string formatted object representation."""
         return '<LD segment {},{} {} {}>'.format(self.channel, self.port, self.state, self.serial)
+
+    @classmethod
+    def from_value(cls, value):
+        """Create a segment from a segment line value.
+
+        Example:
+            Present (15153152MB, SAS, HDD, Connector:CN0, Enclosure:1, Slot:3) ZR7009EV0000C2020QQZ
+            Present (0,8)      WD-WMATV6899266
+
+        Args:
+            value (str): segment line value
+        Returns:
+            LogicalDriveSegment: segment object
+        """
+        state = value.split()[0].strip()
+        serial = value.split(')')[-1].strip()
+        props = [p.split(':')[-1].strip() for p in value.split('(')[1].split(')')[0].split(',')]
+        size = protocol = type_ = enclosure = None
+        if len(props) == 2:
+            channel, slot = props
+        elif len(props) == 5:
+            size, protocol, type_, channel, slot = props
+        else:
+            size, protocol, type_, channel, enclosure, slot = props
+        return cls(channel, slot, state, serial, protocol, type_, size, enclosure)
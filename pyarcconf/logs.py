@@ -0,0 +1,156 @@
+"""Streaming reader of the arcconf GETLOGS records.
+
+The output is fed line by line to an incremental XML parser while arcconf prints it,
+every record (child element of the log root) is yielded and dropped right away,
+so memory does not grow with the log history.
+
+Example:
+    reader = LogReader(controller, 'EVENT', state_file='/var/lib/pyarcconf/logs.json')
+    for record in reader:
+        print(record)
+"""
+import hashlib
+
+from . import runner
+
+LOG_TYPES = ('DEVICE', 'DEAD', 'EVENT', 'STATS', 'CACHE')
+
+
+def record_digest(record):
+    """Get a digest of a record which is stable between processes"""
+    return hashlib.sha1(repr(sorted(record.items())).encode()).hexdigest()[:16]
+
+
+def record_time(record, time_attr='time'):
+    """Get the comparable time of a record, None if it has no time"""
+    value = record.get(time_attr)
+    if value is None:
+        return None
+    return int(value) if value.isdigit() else value
+
+
+class LogReader():
+    """Incremental reader of a GETLOGS log of a controller.
+
+    With a state file a high-water mark is kept per controller and log type,
+    so every pass returns only the records which are newer than the ones seen before.
+    Records are compared by their time attribute, records without it by their position.
+    The mark is saved only when a pass is read to the end.
+    """
+
+    def __init__(self, controller, log_type='EVENT', args=None, state_file=None, time_attr='time'):
+        """Initialize a new reader.
+
+        Args:
+            controller (Controller): controller object
+            log_type (str): One of: DEVICE,DEAD,EVENT,STATS,CACHE
+            args (list): list of additional args
+            state_file (str): json file of the high-water marks, every record is returned if not given
+            time_attr (str): record attribute which orders the records
+        """
+        log_type = log_type.upper()
+        if log_type not in LOG_TYPES:
+            raise ValueError(f'Unknown log type {log_type}, expected one of {LOG_TYPES}')
+        self.controller = controller
+        self.log_type = log_type
+        self.args = list(args) if args else []
+        self.state_file = state_file
+        self.time_attr = time_attr
+        # attributes of the log root element of the last pass
+        self.info = {}
+
+    @property
+    def key(self):
+        """Key of the high-water mark in the state file"""
+        return f'{self.controller.id}:{self.log_type}'
+
+    def __iter__(self):
+        return self.read()
+
+    def records(self, lines=None):
+        """Parse all the records of a log.
+
+        Args:
+            lines (iterable): GETLOGS output lines, queried if not given
+        Returns:
+            iterator: record dicts, the element attributes plus 'tag',
+                attributes of nested elements are set under their tag
+        """
+        import xml.etree.ElementTree as ET
+        if lines is None:
+            lines = self.controller._stream('GETLOGS', [self.log_type] + self.args)
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        root = None
+        depth = 0
+        for line in lines:
+            if root is None and not line.lstrip().startswith('<'):
+                # header lines like 'Controllers found: 1' or 'not supported' messages
+                continue
+            parser.feed(line + '\n')
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    depth += 1
+                    if root is None:
+                        root = elem
+                        self.info = dict(elem.attrib)
+                    continue
+                depth -= 1
+                if depth == 0:
+                    return
+                if depth == 1:
+                    record = dict(elem.attrib)
+                    record['tag'] = elem.tag
+                    for child in elem:
+                        record[child.tag] = dict(child.attrib)
+                    yield record
+                    # dropping the parsed records keeps the memory bounded
+                    root.clear()
+
+    def read(self, lines=None):
+        """Parse the records which are newer than the high-water mark and advance it.
+
+        Args:
+            lines (iterable): GETLOGS output lines, queried if not given
+        Returns:
+            iterator: record dicts, see records()
+        """
+        marks = self._load()
+        mark = marks.get(self.key, {})
+        last_time = mark.get('time')
+        seen = set(mark.get('seen', []))
+        count = mark.get('count', 0)
+
+        new_time = last_time
+        new_seen = set(seen)
+        position = 0
+        for record in self.records(lines):
+            position += 1
+            time = record_time(record, self.time_attr)
+            if time is None:
+                if position > count:
+                    yield record
+                continue
+            digest = record_digest(record)
+            if last_time is not None:
+                if time < last_time or (time == last_time and digest in seen):
+                    continue
+            yield record
+            if new_time is None or time > new_time:
+                new_time, new_seen = time, {digest}
+            elif time == new_time:
+                new_seen.add(digest)
+        marks[self.key] = {'time': new_time, 'seen': sorted(new_seen), 'count': position}
+        self._save(marks)
+
+    def reset(self):
+        """Forget the high-water mark, the next pass returns all the records"""
+        marks = self._load()
+        if marks.pop(self.key, None) is not None:
+            self._save(marks)
+
+    def _load(self):
+        return runner.load_state(self.state_file)
+
+    def _save(self, marks):
+        if self.state_file:
+            runner.save_state(self.state_file, marks)
@@ -1,22 +1,44 @@
 """This code was tested with CLI Version: 4.1.13.31   RaidAPI Version: 5.0.13.1071
 """
+import time
+from datetime import datetime
+
 from . import runner
+from .facts import FactsObject
 
 SEPARATOR_SECTION = 25 * '-'
+EVENT_TIME_FORMAT = '%a %b %d %H:%M:%S %Y'
+
+
+def get_controllers(mvcli_runner=None):
+    """Get all controller objects for further interaction.
+
+    Args:
+        mvcli_runner: runner object
+    Returns:
+        list: list of controller objects.
+    """
+    mvcli_runner = mvcli_runner or runner.CMDRunner('mvcli')
+    out = mvcli_runner.run(args=f'{mvcli_runner.path} info -o hba', universal_newlines=True)[0]
+    ids = []
+    for line in out.split('\n'):
+        if runner.SEPARATOR_ATTRIBUTE in line and runner.convert_key_dict(line).lower() in ('controller id', 'adapter id'):
+            ids.append(line.split(runner.SEPARATOR_ATTRIBUTE, 1)[1].strip())
+    return [Controller(i, mvcli_runner) for i in ids]
 
 
-class Drive():
+class Drive(FactsObject):
     """Object which represents a physcial \ virtual drive."""
 
+    __slots__ = ('controller', 'controller_id', 'id')
+
     def __init__(self, controller_obj, id_):
         """Initialize a new Drive object."""
+        super().__init__()
         self.controller = controller_obj
         self.controller_id = str(controller_obj.id)
         self.id = str(id_)
 
-        # pystorcli compliance
-        self.facts = {}
-
     def __repr__(self):
         """Define a basic representation of the class object."""
         return f'<{"VD" if self.raid else "PD"} {self.id} | {self.raid} {self.capacity}>'
@@ -28,11 +50,9 @@ class Drive():
         section = section.split(runner.SEPARATOR_SECTION)
         for line in section[0].split('\n'):
             if runner.SEPARATOR_ATTRIBUTE in line:
-                key, value = runner.convert_property(line)
-                self.__setattr__(key, value)
+                attr, value = runner.convert_property(line)
                 # pystorcli compliance
-                key = runner.convert_key_dict(line)
-                self.facts[key] = value
+                self._set_fact(runner.convert_key_dict(line), attr, value)
 
     # pystorcli compliance
     @property
@@ -48,6 +68,58 @@ class Drive():
         return runner.format_size(getattr(self, 'size', ''))
 
 
+class Event():
+    """Object which represents an adapter event."""
+
+    def __init__(self, sequence, time, level, description, facts=None):
+        """Initialize a new Event object.
+
+        Args:
+            sequence (int): event sequence number
+            time (datetime|str): event time, the original string if it could not be parsed
+            level (str): INFO, WARNING, ERROR...
+            description (str): event description
+            facts (dict): all the event properties
+        """
+        self.sequence = sequence
+        self.time = time
+        self.level = level
+        self.description = description
+        self.facts = facts or {}
+
+    def __repr__(self):
+        """Define a basic representation of the class object."""
+        return f'<Event {self.sequence} {self.time} [{self.level}] {self.description}>'
+
+    @classmethod
+    def from_properties(cls, props):
+        """Create an event from its properties.
+
+        Example:
+            Sequence:     5
+            Time:         Fri Feb  8 01:59:27 2036
+            Level:        [INFO]
+            Description:  Fast initialization on Virtual Disk 0 completed
+
+        Args:
+            props (dict): event property -> value
+        Returns:
+            Event: event object
+        """
+        try:
+            stamp = datetime.strptime(props.get('Time', ''), EVENT_TIME_FORMAT)
+        except ValueError:
+            stamp = props.get('Time')
+        sequence = props.get('Sequence', '')
+        return cls(
+            int(sequence) if sequence.isdigit() else None,
+            stamp,
+            props.get('Level', '').strip('[]'),
+            props.get('Description', ''),
+            props,
+        )
+
+
 class Controller():
     """Object which represents a controller."""
 
@@ -56,6 +128,8 @@ class Controller():
         self.runner = cmdrunner or runner.CMDRunner()
         self.mode = ''
         self._drives = []
+        # last event sequence returned by tail_events()
+        self.event_sequence = None
 
         # pystorcli compliance
         self.facts = {}
@@ -66,7 +140,8 @@ class Controller():
             self.id = str(info)
             info = None
         self.id = self.id.strip()
-        self.update(info)
+        if not getattr(self.runner, 'asynchronous', False):
+            self.update(info)
 
     def __repr__(self):
         """Define a basic representation of the class object."""
@@ -82,17 +157,36 @@ class Controller():
         Returns:
             str: command output
         """
+        out, err, rc = self.runner.run(args=self._args(cmd, args), universal_newlines=True)
+        return self._output(out), rc
+
+    async def _async_exec(self, cmd, args=None):
+        """Async version of _exec(), the runner has to be an AsyncCMDRunner"""
+        out, err, rc = await self.runner.run(args=self._args(cmd, args))
+        return self._output(out), rc
+
+    def _args(self, cmd, args=None):
+        """Build the full command line
+        Args:
+            cmd: list or string of command to run
+            args (list): list of args for the command
+        Returns:
+            str: command line
+        """
         args = args or []
         if type(cmd) == str:
             cmd = [cmd]
-        cmd = f'{self.runner.path} {" ".join(cmd + args)}'
-        out, err, rc = self.runner.run(args=cmd, universal_newlines=True)
+        return f'{self.runner.path} {" ".join(cmd + args)}'
+
+    def _output(self, out):
+        """Remove the mvcli banner and blank lines from a command output, a session runner prints no banner per command"""
         if not out:
-            return '', rc
+            return ''
         out = out.split('\n')
-        out = runner.cut_lines(out, 2)
+        if not getattr(runner.innermost(self.runner), 'session', False):
+            out = runner.cut_lines(out, 2)
         out = runner.sanitize_stdout(out)
-        return '\n'.join(out), rc
+        return '\n'.join(out)
 
     def _execute(self, cmd, args=[], rc=False):
         """Execute a command using arcconf.
@@ -107,14 +201,54 @@ class Controller():
         result = self._exec([cmd] + args)
         return (result[0], result[1]) if rc else result[0]
 
+    async def _async_execute(self, cmd, args=[], rc=False):
+        """Async version of _execute()"""
+        result = await self._async_exec([cmd] + args)
+        return (result[0], result[1]) if rc else result[0]
+
+    def _execute_many(self, cmds):
+        """Execute a batch of commands with a single runner call, concurrently unless the runner batches them itself
+
+        Args:
+            cmds (list): command strings
+        Returns:
+            list: outputs in the order of cmds
+        """
+        results = self.runner.run_many([self._args(cmd) for cmd in cmds], universal_newlines=True)
+        return [self._output(out) for out, _, _ in results]
+
+    async def _async_execute_many(self, cmds):
+        """Async version of _execute_many(), the commands are gathered"""
+        import asyncio
+        return await asyncio.gather(*[self._async_execute(cmd) for cmd in cmds])
+
+    def _select_adapter(self):
+        """Set this controller as the default adapter of the following CLI commands.
+        (not mandatory, just in case host has several marvels)
+        The selection is kept by mvcli, so it is done once per runner unless another adapter was selected.
+        It is recorded on the innermost runner, which a session restart resets.
+        """
+        cli = runner.innermost(self.runner)
+        if getattr(cli, 'adapter_id', None) == self.id:
+            return
+        self._execute(f'adapter -i {self.id}')
+        cli.adapter_id = self.id
+
+    async def _async_select_adapter(self):
+        """Async version of _select_adapter()"""
+        cli = runner.innermost(self.runner)
+        if getattr(cli, 'adapter_id', None) == self.id:
+            return
+        await self._async_execute(f'adapter -i {self.id}')
+        cli.adapter_id = self.id
+
     def get_controllers(self):
         """Get all controller objects for further interaction.
 
         Returns:
             list: list of controller objects.
         """
-        result = self._execute('info -o hba')[0].split('\n\n')
-        return [Controller(info, self.runner) for info in result]
+        return get_controllers(self.runner)
 
     @property
     def model(self):
@@ -189,12 +323,18 @@ class Controller():
             print('Command failed, aborting')
             return
 
-        # Setting default adapter for the following CLI commands
-        # (not mandatory, just in case host has several marvels)
-        self._execute(f'adapter -i {self.id}')
+        self._select_adapter()
+        get_info = self._execute(f'get -o hba')
+        self._update(result, get_info)
+
+    def _update(self, result, get_info):
+        """Parse the output of info and get commands of hba
 
+        Args:
+            result (str): info -o hba output
+            get_info (str): get -o hba output
+        """
         section = list(filter(None, result.split('\n\n')))
-        get_info = self._execute(f'get -o hba')
         info = section[0] + '\n' + get_info
         for line in info.split('\n'):
             if runner.SEPARATOR_ATTRIBUTE in line:
@@ -212,34 +352,41 @@ class Controller():
     def get_pds(self):
         """Parse the info about physical drives.
         """
-        self._drives = []
-        result = self._execute('info -o pd')
-        result = runner.cut_lines(result, 0, 3).split(SEPARATOR_SECTION)[1]
-        result = result.split('\n\n')
-        idx = 0
-        for part in result:
-            get_info = self._execute(f'get -o pd -i {idx}')
-            drive = Drive(self, idx)
-            drive.update(part + '\n' + get_info)
-            self._drives.append(drive)
-            idx += 1
+        self._select_adapter()
+        parts = self._split_drives(self._execute('info -o pd'))
+        get_info = self._execute_many([f'get -o pd -i {idx}' for idx in range(len(parts))])
+        self._drives = self._build_drives(parts, get_info)
         return self._drives
-    
+
     def get_vds(self):
         """Parse the info about physical drives.
         """
-        self._drives = []
-        result = self._execute('info -o vd')
+        self._select_adapter()
+        parts = self._split_drives(self._execute('info -o vd'))
+        get_info = self._execute_many([f'get -o vd -i {idx}' for idx in range(len(parts))])
+        self._drives = self._build_drives(parts, get_info)
+        return self._drives
+
+    def _split_drives(self, result):
+        """Split an info -o pd|vd output into a part per drive"""
         result = runner.cut_lines(result, 0, 3).split(SEPARATOR_SECTION)[1]
-        result = result.split('\n\n')
-        idx = 0
-        for part in result:
-            get_info = self._execute(f'get -o vd -i {idx}')
+        return result.split('\n\n')
+
+    def _build_drives(self, parts, get_info):
+        """Create drive objects from info and get outputs
+
+        Args:
+            parts (list): info output part per drive
+            get_info (list): get output per drive
+        Returns:
+            list: list of drives
+        """
+        drives = []
+        for idx, part in enumerate(parts):
             drive = Drive(self, idx)
-            drive.update(part + '\n' + get_info)
-            self._drives.append(drive)
-            idx += 1
-        return self._drives
+            drive.update(part + '\n' + get_info[idx])
+            drives.append(drive)
+        return drives
     
     def get_events(self, sequence=0, once=False):
         """Description:Get the current events.
@@ -262,7 +409,10 @@ class Controller():
         """
         args = f' -s {sequence}' if sequence else ''
         args += ' --once' if once else ''
-        result = self._execute('event' + args)
+        return self._parse_events(self._execute('event' + args))
+
+    def _parse_events(self, result):
+        """Parse an event command output"""
         result = runner.cut_lines(result, 1)
         result = result.split('\n\n')
         events = {}
@@ -271,6 +421,133 @@ class Controller():
             events[part['Sequence']] = part
         return events
 
+    def tail_events(self, follow=False, interval=10, checkpoint=None):
+        """Get the events which are newer than the last one returned, -s is passed automatically.
+        An event is checkpointed when the next one is requested,
+        so an event whose processing was interrupted is returned again.
+        The checkpoint file is written once per poll and when the iterator is closed.
+
+        Args:
+            follow (bool): keep polling for new events
+            interval (float): seconds between polls in follow mode
+            checkpoint (str): json file of the last returned sequence per adapter,
+                the sequence is kept only by this object if not given
+        Returns:
+            iterator: Event objects in sequence order
+        """
+        self._load_checkpoint(checkpoint)
+        try:
+            while True:
+                for event in self._new_events(self._execute('event' + self._sequence_args())):
+                    yield event
+                    self.event_sequence = event.sequence
+                self._save_checkpoint(checkpoint)
+                if not follow:
+                    return
+                time.sleep(interval)
+        finally:
+            self._save_checkpoint(checkpoint)
+
+    def _sequence_args(self):
+        """Get the event command args of the events after the last returned one"""
+        return '' if self.event_sequence is None else f' -s {self.event_sequence}'
+
+    def _load_checkpoint(self, checkpoint):
+        """Load the last returned event sequence of the adapter from a checkpoint file"""
+        if checkpoint and self.event_sequence is None:
+            self.event_sequence = runner.load_state(checkpoint).get(self.id)
+        self._checkpointed = self.event_sequence
+
+    def _save_checkpoint(self, checkpoint):
+        """Save the last returned event sequence of the adapter, the file is written only if it changed"""
+        if not checkpoint or self.event_sequence == self._checkpointed:
+            return
+        state = runner.load_state(checkpoint)
+        state[self.id] = self.event_sequence
+        runner.save_state(checkpoint, state)
+        self._checkpointed = self.event_sequence
+
+    def _new_events(self, result):
+        """Get the events of an event command output which are newer than the last returned one
+
+        Args:
+            result (str): event command output
+        Returns:
+            list: Event objects in sequence order, mvcli prints the newest first
+        """
+        last = self.event_sequence
+        events = [e for e in self._iter_events(result) if e.sequence is not None and (last is None or e.sequence > last)]
+        return sorted(events, key=lambda e: e.sequence)
+
+    def _iter_events(self, result):
+        """Parse the events of an event command output while they are read
+
+        Args:
+            result (str): event command output
+        Returns:
+            iterator: Event objects
+        """
+        props = {}
+        for line in result.split('\n') + ['']:
+            if not line.strip():
+                if props:
+                    yield Event.from_properties(props)
+                props = {}
+            elif ':' in line:
+                key, value = line.split(':', 1)
+                props[key.strip()] = value.strip()
+
+    async def async_update(self, info=None):
+        """Async version of update()"""
+        if not self.id:
+            print('Please set controller id to update, aborting')
+            return
+        result = info or await self._async_execute(f'info -o hba -i {self.id}')
+        if not result:
+            print('Command failed, aborting')
+            return
+        await self._async_select_adapter()
+        get_info = await self._async_execute(f'get -o hba')
+        self._update(result, get_info)
+
+    async def async_get_pds(self):
+        """Async version of get_pds()"""
+        await self._async_select_adapter()
+        parts = self._split_drives(await self._async_execute('info -o pd'))
+        get_info = await self._async_execute_many([f'get -o pd -i {idx}' for idx in range(len(parts))])
+        self._drives = self._build_drives(parts, get_info)
+        return self._drives
+
+    async def async_get_vds(self):
+        """Async version of get_vds()"""
+        await self._async_select_adapter()
+        parts = self._split_drives(await self._async_execute('info -o vd'))
+        get_info = await self._async_execute_many([f'get -o vd -i {idx}' for idx in range(len(parts))])
+        self._drives = self._build_drives(parts, get_info)
+        return self._drives
+
+    async def async_get_events(self, sequence=0, once=False):
+        """Async version of get_events()"""
+        args = f' -s {sequence}' if sequence else ''
+        args += ' --once' if once else ''
+        return self._parse_events(await self._async_execute('event' + args))
+
+    async def async_tail_events(self, follow=False, interval=10, checkpoint=None):
+        """Async version of tail_events()"""
+        import asyncio
+        self._load_checkpoint(checkpoint)
+        try:
+            while True:
+                for event in self._new_events(await self._async_execute('event' + self._sequence_args())):
+                    yield event
+                    self.event_sequence = event.sequence
+                self._save_checkpoint(checkpoint)
+                if not follow:
+                    return
+                await asyncio.sleep(interval)
+        finally:
+            self._save_checkpoint(checkpoint)
+
     def create_vd(self, name, raid, drives, strip: str = '64', size: str = 'MAX'):
         """
         create -o<vd> -d<PD id list> -r<0|1|10|5|1e>[-n <name>][-b <16|32|64|128>]
@@ -0,0 +1,250 @@
+"""PHY error counters of the PHYERRORLOG outputs.
+
+The counters of a device are kept as integers in one flat array, a row per PHY,
+so deltas and rates between two polls are computed over the whole array at once.
+
+Example:
+    before = drive.phyerrorcounters
+    time.sleep(60)
+    rates = drive.phyerrorcounters.rate(before, 60)
+    print(rates['0']['invalid_dword_count'])
+"""
+import re
+from array import array
+from collections.abc import Mapping
+
+from . import runner
+
+# ID  Size  Value  Description row of the SATA Phy Event Counters table
+SATA_COUNTER = re.compile(r'^\s*0x[0-9a-fA-F]+\s+\d+\s+(\d+)\s+(\S.*?)\s*$')
+# PHY id of the SATA link counters
+SATA_PHY = '0'
+
+# counter names tuples, the counters of the same output format share one tuple
+_names = {}
+
+
+def parse_phyerrorlog(output):
+    """Parse the error counters of a PHYERRORLOG output.
+
+    SAS outputs (per device or per controller) have a block of counters per PHY Identifier,
+    SATA devices have a single table of Phy Event Counters which is returned as PHY 0.
+
+    Args:
+        output (str): PHYERRORLOG output
+    Returns:
+        PhyCounters: counters
+    """
+    phys = {}
+    phy = None
+    for line in output.split('\n'):
+        match = SATA_COUNTER.match(line)
+        if match:
+            phys.setdefault(SATA_PHY, {})[runner.convert_key_attribute(match.group(2))] = int(match.group(1))
+            continue
+        if runner.SEPARATOR_ATTRIBUTE not in line:
+            continue
+        key, value = line.split(runner.SEPARATOR_ATTRIBUTE, 1)
+        key = key.strip()
+        value = value.strip()
+        if key == 'PHY Identifier':
+            phy = value
+            phys.setdefault(phy, {})
+        elif phy is not None and key.endswith('Count') and value.isdigit():
+            phys[phy][runner.convert_key_attribute(key)] = int(value)
+
+    names = {}
+    for counters in phys.values():
+        names.update(dict.fromkeys(counters))
+    result = PhyCounters(phys, names)
+    values = result.values
+    width = len(result.names)
+    for row, counters in enumerate(phys.values()):
+        for column, name in enumerate(result.names):
+            values[row * width + column] = counters.get(name, 0)
+    return result
+
+
+class PhyCounters(Mapping):
+    """Integer error counters of the PHYs of a device.
+
+    It is a mapping of PHY id -> {counter name: value}, the values are stored
+    in a flat array of len(phys) rows and len(names) columns.
+    """
+
+    __slots__ = ('phys', 'names', 'values', '_rows')
+
+    def __init__(self, phys=(), names=(), values=None):
+        """Initialize new counters, all zero if values are not given.
+
+        Args:
+            phys (iterable): PHY ids
+            names (iterable): counter names
+            values (array): row major values
+        """
+        self.phys = tuple(phys)
+        # PHY id -> row
+        self._rows = {phy: row for row, phy in enumerate(self.phys)}
+        names = tuple(names)
+        self.names = _names.setdefault(names, names)
+        if values is None:
+            values = array('q', [0]) * (len(self.phys) * len(self.names))
+        self.values = values
+
+    def __getitem__(self, phy):
+        row = self._row(phy)
+        return dict(zip(self.names, self.values[row:row + len(self.names)]))
+
+    def __iter__(self):
+        return iter(self.phys)
+
+    def __len__(self):
+        return len(self.phys)
+
+    def __repr__(self):
+        return '<{} {} PHYs | {}>'.format(type(self).__name__, len(self.phys), self.totals())
+
+    def _row(self, phy):
+        """Get the offset of the row of a PHY in values"""
+        row = self._rows.get(phy)
+        if row is None:
+            row = self._rows.get(str(phy))
+        if row is None:
+            raise KeyError(phy)
+        return row * len(self.names)
+
+    def counter(self, phy, name):
+        """Get a counter of a PHY"""
+        return self.values[self._row(phy) + self.names.index(name)]
+
+    def column(self, name):
+        """Get the values of a counter of all PHYs
+
+        Returns:
+            array: values in the order of phys
+        """
+        return self.values[self.names.index(name)::len(self.names)]
+
+    def totals(self):
+        """Get the sum of every counter over the PHYs
+
+        Returns:
+            dict: counter name -> sum
+        """
+        return {name: sum(self.values[column::len(self.names)]) for column, name in enumerate(self.names)}
+
+    def reindex(self, phys, names):
+        """Get the counters laid out in other PHYs and names, missing counters are 0"""
+        phys = tuple(phys)
+        names = tuple(names)
+        if phys == self.phys and names == self.names:
+            return self
+        result = PhyCounters(phys, names)
+        width = len(names)
+        columns = [(column, self.names.index(name)) for column, name in enumerate(names) if name in self.names]
+        for row, phy in enumerate(phys):
+            if phy not in self._rows:
+                continue
+            source = self._row(phy)
+            for column, source_column in columns:
+                result.values[row * width + column] = self.values[source + source_column]
+        return result
+
+    def delta(self, previous):
+        """Get the increase of the counters since a previous poll.
+        A counter which went down was reset, its increase is the current value.
+
+        Args:
+            previous (PhyCounters): counters of the previous poll
+        Returns:
+            PhyCounters: increases
+        """
+        previous = previous.reindex(self.phys, self.names)
+        values = array('q', map(lambda new, old: new - old if new >= old else new, self.values, previous.values))
+        return self._with_values(values)
+
+    def rate(self, previous, seconds):
+        """Get the increase per second of the counters since a previous poll
+
+        Args:
+            previous (PhyCounters): counters of the previous poll
+            seconds (float): time between the polls
+        Returns:
+            PhyCounters: float rates
+        """
+        values = array('d', (value / seconds for value in self.delta(previous).values))
+        return self._with_values(values)
+
+    def _with_values(self, values):
+        """Get counters of the same layout with other values"""
+        return PhyCounters(self.phys, self.names, values)
+
+
+class PhyErrorTable(PhyCounters):
+    """PHY error counters of a controller and its drives in one table.
+
+    The rows are indexed by (channel, device, phy), the controller PHYs have None channel and device.
+    drives maps (channel, device) to the PhysicalDrive objects.
+    The columns are the counters of all the devices, a row only has the counters reported by its device,
+    e.g. SAS counters are not in the rows of SATA drives.
+    """
+
+    __slots__ = ('drives', 'reported')
+
+    def __init__(self, phys=(), names=(), values=None, drives=None, reported=None):
+        """Initialize a new table, see PhyCounters
+
+        Args:
+            drives (dict): (channel, device) -> PhysicalDrive
+            reported (dict): (channel, device) -> names of the counters reported by the device, all names if missing
+        """
+        super().__init__(phys, names, values)
+        self.drives = drives or {}
+        self.reported = reported or {}
+
+    def __getitem__(self, phy):
+        counters = super().__getitem__(phy)
+        names = self.reported.get(tuple(phy[:2]))
+        if names is None:
+            return counters
+        return {name: counters[name] for name in names}
+
+    def _with_values(self, values):
+        return PhyErrorTable(self.phys, self.names, values, self.drives, self.reported)
+
+    @classmethod
+    def build(cls, counters, drives=None):
+        """Build a table of the counters of several devices.
+
+        Args:
+            counters (dict): (channel, device) -> PhyCounters, (None, None) for the controller PHYs
+            drives (dict): (channel, device) -> PhysicalDrive
+        Returns:
+            PhyErrorTable: table
+        """
+        names = {}
+        for device_counters in counters.values():
+            names.update(dict.fromkeys(device_counters.names))
+        phys = [key + (phy,) for key, device_counters in counters.items() for phy in device_counters.phys]
+        reported = {key: device_counters.names for key, device_counters in counters.items()}
+        table = cls(phys, names, drives=drives, reported=reported)
+        offset = 0
+        for device_counters in counters.values():
+            device_counters = device_counters.reindex(device_counters.phys, table.names)
+            table.values[offset:offset + len(device_counters.values)] = device_counters.values
+            offset += len(device_counters.values)
+        return table
+
+    def device(self, channel=None, device=None):
+        """Get the counters of a drive, of the controller PHYs if channel and device are not given
+
+        Returns:
+            PhyCounters: PHY id -> {counter: value}, only the counters reported by the device
+        """
+        key = (channel, device)
+        rows = [(row, phy[2]) for row, phy in enumerate(self.phys) if phy[:2] == key]
+        result = PhyCounters([phy for _, phy in rows], self.names)
+        width = len(self.names)
+        for target, (row, _) in enumerate(rows):
+            result.values[target * width:(target + 1) * width] = self.values[row * width:(row + 1) * width]
+        return result.reindex(result.phys, self.reported.get(key, self.names))
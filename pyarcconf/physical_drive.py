@@ -1,19 +1,25 @@
+import itertools
+
 from . import runner
+from .facts import FactsObject
+from .phy import PhyCounters, parse_phyerrorlog
 
 SEPARATOR_SECTION = 64 * '-'
 
 
-class PhysicalDrive():
+class PhysicalDrive(FactsObject):
     """Object which represents a physical drive."""
 
+    __slots__ = ('controller', 'channel', 'device', '_digest')
+
     def __init__(self, controller_obj, channel, device):
         """Initialize a new object."""
+        super().__init__()
         self.controller = controller_obj
         self.channel = str(channel).strip()
         self.device = str(device).strip()
-
-        # pystorcli compliance
-        self.facts = {}
+        # hash of the parse events the drive was last reloaded from
+        self._digest = None
 
     def __repr__(self):
         """Define a basic representation of the class object."""
@@ -47,28 +53,67 @@ class PhysicalDrive():
         return result
 
     def update(self, config=''):
+        """Parse the drive info
+
+        Args:
+            config (str|list): GETCONFIG PD output without the header, queried if not given
+        """
         if config and type(config) == list:
-            config = '\n'.join(config)
-        section = config or self._get_config()
-        section = section.split(runner.SEPARATOR_SECTION)
-        for line in section[0].split('\n'):
-            if runner.SEPARATOR_ATTRIBUTE in line:
-                key, value = runner.convert_property(line)
-                self.__setattr__(key, value)
-                # pystorcli compliance
-                key = runner.convert_key_dict(line)
-                self.facts[key] = value
-        if len(section) == 1:
+            lines = config
+        elif config:
+            lines = config.split('\n')
+        else:
+            lines = itertools.islice(self.controller._stream('GETCONFIG', ['PD', self.channel, self.device]), 4, None)
+        self.load(runner.tokenize(lines))
+
+    def load(self, events):
+        """Set the drive attributes from parse events
+
+        Args:
+            events (iterable): runner.tokenize() events of the drive
+        """
+        title = None
+        props = {}
+        sub_section = ''
+        for section, subsection, key, value in events:
+            if subsection is None:
+                self._set_section(title, props)
+                title, props, sub_section = section, {}, ''
+            elif title is None:
+                if key is not None:
+                    value = runner.convert_value_attribute(value)
+                    # pystorcli compliance
+                    self._set_fact(runner.convert_key_dict(key), runner.convert_key_attribute(key), value)
+            elif key is None:
+                sub_section = runner.convert_key_dict(subsection)
+            else:
+                runner.add_property(props, sub_section, key, value)
+        self._set_section(title, props)
+
+    def reload(self, events):
+        """Update the drive in place from parse events, only the changed facts are rewritten
+
+        Args:
+            events (list): runner.tokenize() events of the drive
+        Returns:
+            dict: fact key -> (old value, new value) of the changed facts, empty if the output did not change
+        """
+        digest = hash(tuple(events))
+        if digest == self._digest:
+            return {}
+        self._digest = digest
+        fresh = type(self)(self.controller, self.channel, self.device)
+        fresh.load(events)
+        return self._merge(fresh)
+
+    def _set_section(self, title, props):
+        """Set a section of properties as an attribute"""
+        if title is None or not props:
             return
-        for idx in range(1, len(section), 2):
-            props = runner.get_properties(section[idx + 1])
-            if props:
-                attr = runner.convert_key_attribute(section[idx])
-                # pystorcli compliance
-                attr = attr.replace('device_', '')
-                self.__setattr__(attr, props)
-                key = runner.convert_key_dict(section[idx])
-                self.facts[key] = props
+        attr = runner.convert_key_attribute(title)
+        # pystorcli compliance
+        attr = attr.replace('device_', '')
+        self._set_fact(runner.convert_key_dict(title), attr, props)
 
     # pystorcli compliance
     @property
@@ -126,21 +171,11 @@ class PhysicalDrive():
 
     @property
     def phyerrorcounters(self):
+        """
+        Return:
+            PhyCounters: PHY id -> {counter: int}, SATA Phy Event Counters are PHY 0
+        """
         result, rc = self._execute('PHYERRORLOG')
-        if rc == 2:
-            return {}
-        sata = 'SATA' in result
-        result = runner.cut_lines(result, 16 if sata else 15)
-        data = {}
-        #TODO: add sata logic
-        if not sata:
-            for phy in result.split('\n\n'):
-                if 'No device attached' in phy:
-                    continue
-                phy = phy.split('\n')
-                _, phyid = runner.convert_property(phy[0])
-                data[phyid] = {}
-                for attr in phy[7:]:
-                    key, value = runner.convert_property(attr)
-                    data[phyid][key] = value
-        return data
+        if rc == 2 or not result:
+            return PhyCounters()
+        return parse_phyerrorlog(result)
@@ -1,17 +1,40 @@
-"""Command execute and output parse methods"""
-import humanfriendly
+"""Command execute and output parse methods
+
+asyncio, concurrent.futures, json, tempfile and humanfriendly are imported where they are used,
+since short lived scripts which parse one output pay for every import on start.
+"""
+import functools
 import os
 import re
+import select
+import shlex
 import shutil
-from subprocess import Popen, PIPE
+import threading
+import time
+from collections import OrderedDict
+from subprocess import Popen, PIPE, STDOUT, TimeoutExpired
 
 SEPARATOR_ATTRIBUTE = ': '
 SEPARATOR_SECTION = 56 * '-'
+DATASETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datasets')
+
+# decimal units, the same as humanfriendly.parse_size()
+SIZE_UNITS = {'B': 1, 'KB': 1000, 'MB': 1000 ** 2, 'GB': 1000 ** 3}
+TRUE_VALUES = frozenset(['enabled', 'yes', 'true'])
+FALSE_VALUES = frozenset(['disabled', 'no', 'false'])
+KEY_SEPARATORS = str.maketrans(' -,/', '____')
+KEY_GARBAGE = re.compile(r'[^a-zA-Z0-9_]')
+
+# (binary, PATH) -> resolved binary path, shared by all the runners of the process
+_binaries = {}
+_binaries_lock = threading.Lock()
 
 
 class CMDRunner():
     """This is a simple wrapper for subprocess.Popen()/subprocess.run(). The main idea is to inherit this class and create easy mockable tests.
     """
+    asynchronous = False
+
     def __init__(self, path=''):
         """Initialize a new MVCLI object.
         
@@ -23,22 +46,611 @@ class CMDRunner():
     def run(self, args, **kwargs):
         """Runs a command and returns the output.
         """
+        if type(args) == str:
+            args = shlex.split(args)
+        # output is always decoded here
+        kwargs.pop('universal_newlines', None)
         proc = Popen(args, stdout=PIPE, stderr=PIPE, **kwargs)
 
-        _stdout, _stderr = [i.decode('utf8') for i in proc.communicate()]
+        _stdout, _stderr = [i.decode('utf8') if type(i) == bytes else i for i in proc.communicate()]
 
         return _stdout, _stderr, proc.returncode
 
+    def run_many(self, args_list, max_workers=8, **kwargs):
+        """Runs a batch of commands concurrently.
+
+        Args:
+            args_list (list): command lines
+            max_workers (int): max number of commands running at the same time
+        Returns:
+            list: run() results in the order of args_list
+        """
+        if len(args_list) < 2:
+            return [self.run(args, **kwargs) for args in args_list]
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(args_list))) as pool:
+            return list(pool.map(lambda args: self.run(args, **kwargs), args_list))
+
+    def stream(self, args, **kwargs):
+        """Runs a command and yields the output lines while they are read from the pipe.
+        Subclasses which override run() only are served from its output.
+
+        Raises:
+            RuntimeError: if the command fails, after its output lines were yielded
+        """
+        if type(self).run is not CMDRunner.run:
+            out, err, rc = self.run(args, **kwargs)
+            if rc:
+                raise RuntimeError(f'{args} failed with return code {rc}: {err.strip()}')
+            yield from out.split('\n')
+            return
+        if type(args) == str:
+            args = shlex.split(args)
+        kwargs.pop('universal_newlines', None)
+        import tempfile
+        # stderr goes to a file, a pipe which is not read could block the command
+        with tempfile.TemporaryFile() as stderr:
+            with Popen(args, stdout=PIPE, stderr=stderr, **kwargs) as proc:
+                for line in proc.stdout:
+                    yield line.decode('utf8').rstrip('\r\n')
+            if proc.returncode:
+                stderr.seek(0)
+                err = stderr.read().decode('utf8', 'replace').strip()
+                raise RuntimeError(f'{args} failed with return code {proc.returncode}: {err}')
+
     def binaryCheck(self, binary) -> str:
         """Verify and return full binary path
         """
-        _bin = shutil.which(binary)
+        _bin = which(binary)
         if not _bin:
             raise Exception(
                 "Cannot find storcli binary '%s'" % (binary))
         return _bin
 
 
+class AsyncCMDRunner(CMDRunner):
+    """asyncio version of CMDRunner, run() is a coroutine built on asyncio.create_subprocess_exec().
+    Objects created with this runner are not updated on init, use their async_* methods.
+    """
+    asynchronous = True
+
+    async def run(self, args, **kwargs):
+        """Runs a command and returns the output.
+        """
+        import asyncio
+        if type(args) == str:
+            args = shlex.split(args)
+        # output is always decoded here
+        kwargs.pop('universal_newlines', None)
+        proc = await asyncio.create_subprocess_exec(*args, stdout=PIPE, stderr=PIPE, **kwargs)
+
+        _stdout, _stderr = [i.decode('utf8') for i in await proc.communicate()]
+
+        return _stdout, _stderr, proc.returncode
+
+
+class CachedCMDRunner(CMDRunner):
+    """Caching wrapper of another runner. Results of read commands are cached per command line
+    for ttl seconds with LRU eviction, any other command invalidates the cached reads of its controller.
+    mvcli reads are cached per selected adapter, an adapter selection is passed through and invalidates nothing.
+
+    Example:
+        ctrl = Controller(1, CachedCMDRunner(ttl=10))
+    """
+    READ_COMMANDS = [
+        # arcconf
+        'GETCONFIG', 'GETSTATUS', 'GETLOGS', 'GETVERSION', 'GETSMARTSTATS', 'GETPERFORM',
+        'LIST', 'PHYERRORLOG', 'EXPANDERLIST',
+        # mvcli
+        'INFO', 'GET', 'EVENT',
+    ]
+    # mvcli command which selects the adapter of the following commands
+    SELECT_COMMAND = 'ADAPTER'
+
+    def __init__(self, cmdrunner=None, ttl=30, maxsize=256):
+        """Initialize a new caching runner.
+
+        Args:
+            cmdrunner (CMDRunner): runner which executes the commands
+            ttl (float): seconds a result is valid
+            maxsize (int): max number of cached results
+        """
+        self.runner = cmdrunner or CMDRunner()
+        self.path = self.runner.path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # mvcli adapter selected by the last adapter command, None for arcconf
+        self.adapter = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def run(self, args, **kwargs):
+        """Runs a command and returns the output, cached if it is a read command.
+        """
+        argv = tuple(shlex.split(args) if type(args) == str else args)
+        command = argv[1].upper() if len(argv) > 1 else ''
+        if command == self.SELECT_COMMAND:
+            # the selection has to reach the CLI, it does not change any configuration
+            result = self.runner.run(args, **kwargs)
+            if not result[2]:
+                self.adapter = self._option(argv, '-i')
+            return result
+        if command not in self.READ_COMMANDS:
+            result = self.runner.run(args, **kwargs)
+            self.invalidate(self.adapter if self.adapter is not None else self._controller_id(argv))
+            return result
+        key = (self.adapter,) + argv
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] > now:
+                self._cache.move_to_end(key)
+                return cached[1]
+        result = self.runner.run(args, **kwargs)
+        if not result[2]:
+            with self._lock:
+                self._cache[key] = (now + self.ttl, result)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+        return result
+
+    def invalidate(self, controller_id=None):
+        """Drop cached results of a controller and the ones not bound to any controller.
+
+        Args:
+            controller_id (str): arcconf controller id or mvcli adapter id, all results are dropped if not given
+        """
+        with self._lock:
+            if controller_id is None:
+                self._cache.clear()
+                return
+            for key in list(self._cache):
+                adapter, argv = key[0], key[1:]
+                if (adapter if adapter is not None else self._controller_id(argv)) in [controller_id, None]:
+                    del self._cache[key]
+
+    @staticmethod
+    def _controller_id(argv):
+        """Get controller id from an arcconf command line, None if there is no id"""
+        if len(argv) > 2 and argv[2].isdigit():
+            return argv[2]
+        return None
+
+    @staticmethod
+    def _option(argv, option):
+        """Get the value of a command line option, None if it is not given"""
+        if option in argv[:-1]:
+            return argv[argv.index(option) + 1]
+        return None
+
+
+class CoalescingCMDRunner(CMDRunner):
+    """Single-flight wrapper of another runner for threaded callers.
+    Concurrent read commands with the same argv share one run of the wrapped runner and its result,
+    other commands are serialized per controller in the order they arrive.
+    The parse methods of Controller share their parsed result the same way, see single_flight().
+
+    Example:
+        cmdrunner = CoalescingCMDRunner(CMDRunner('arcconf'))
+        ctrls = get_controllers(cmdrunner, parallel=True)
+    """
+    READ_COMMANDS = CachedCMDRunner.READ_COMMANDS
+
+    def __init__(self, cmdrunner=None):
+        """Initialize a new coalescing runner.
+
+        Args:
+            cmdrunner (CMDRunner): runner which executes the commands
+        """
+        self.runner = cmdrunner or CMDRunner()
+        self.path = self.runner.path
+        # argv -> in flight read
+        self._flights = SingleFlight()
+        # controller id -> queue of the other commands
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    def run(self, args, **kwargs):
+        """Runs a command and returns the output, shared with the concurrent callers of the same read command.
+        """
+        argv = tuple(shlex.split(args) if type(args) == str else args)
+        if len(argv) < 2 or argv[1].upper() not in self.READ_COMMANDS:
+            controller_id = CachedCMDRunner._controller_id(argv)
+            with self._lock:
+                queue = self._queues.setdefault(controller_id, _TicketQueue())
+            # reads started before this command do not serve the callers which come after it
+            self._flights.forget(
+                lambda key: controller_id is None or CachedCMDRunner._controller_id(key) in [controller_id, None])
+            with queue:
+                return self.runner.run(args, **kwargs)
+        return self._flights.do(argv, lambda: self.runner.run(args, **kwargs))
+
+
+class SingleFlight():
+    """Share a call and its result with the concurrent callers of the same key.
+    The first caller runs the call, the others wait for its result or its exception.
+    """
+
+    def __init__(self):
+        # key -> in flight call
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """Run func, or wait for the in flight call of the same key.
+        A call of the same key made by the running call itself is not shared.
+
+        Args:
+            key: hashable call key
+            func (callable): function without arguments
+        Returns:
+            result of func
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None or call.thread is threading.current_thread()
+            if leader:
+                previous = call
+                call = self._calls[key] = _Call()
+        if not leader:
+            return call.wait()
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    if previous is None:
+                        del self._calls[key]
+                    else:
+                        self._calls[key] = previous
+            call.done.set()
+        return call.result
+
+    def forget(self, match):
+        """Detach the in flight calls of the matching keys, later callers do not wait for them
+
+        Args:
+            match (callable): key -> bool
+        """
+        with self._lock:
+            for key in list(self._calls):
+                if match(key):
+                    del self._calls[key]
+
+
+def single_flight(method):
+    """Decorator of the parse methods which query the CLI. Concurrent calls without arguments
+    on the same object share one call and its parsed result, calls with arguments are not shared.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if args or kwargs:
+            return method(self, *args, **kwargs)
+        flights = self.__dict__.setdefault('_flights', SingleFlight())
+        return flights.do(method.__name__, lambda: method(self))
+    return wrapper
+
+
+class _Call():
+    """In flight call of SingleFlight"""
+
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self):
+        """Wait for the leader caller and return its result"""
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class _TicketQueue():
+    """FIFO lock, the holders enter in the order they asked for it"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._next = 0
+        self._serving = 0
+
+    def __enter__(self):
+        with self._cond:
+            ticket = self._next
+            self._next += 1
+            self._cond.wait_for(lambda: self._serving == ticket)
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self._serving += 1
+            self._cond.notify_all()
+
+
+class ReplayRunner(CMDRunner):
+    """Serve captured command outputs from a dataset directory instead of running the binary.
+    Outputs are looked up by dataset_name() of the command line, case insensitive.
+
+    Example:
+        ctrl = Controller(1, ReplayRunner('hba'))
+    """
+    def __init__(self, directory, path='arcconf'):
+        """Initialize a new replay runner.
+
+        Args:
+            directory (str): dataset directory, or a name of a bundled dataset (hba, raid, mvcli, ...)
+            path (str): binary name to mimic
+        """
+        if not os.path.isdir(directory):
+            directory = os.path.join(DATASETS, directory)
+        if not os.path.isdir(directory):
+            raise Exception("Cannot find dataset directory '%s'" % (directory))
+        self.directory = directory
+        self.path = path
+        self._files = {f.lower(): os.path.join(directory, f) for f in os.listdir(directory)}
+        self._outputs = {}
+
+    def run(self, args, **kwargs):
+        """Returns the captured output of a command.
+        """
+        name = dataset_name(args).lower()
+        if name not in self._outputs:
+            if name not in self._files:
+                return '', f'No captured output {name} in {self.directory}', 1
+            with open(self._files[name], encoding='utf8') as f:
+                self._outputs[name] = f.read()
+        return self._outputs[name], '', 0
+
+
+class RecordingRunner(CMDRunner):
+    """Run commands with another runner and save their outputs into a dataset directory,
+    the result can be served later by ReplayRunner.
+
+    Example:
+        ctrl = Controller(1, RecordingRunner('/tmp/host1'))
+        ctrl.initialize()
+    """
+    def __init__(self, directory, cmdrunner=None):
+        """Initialize a new recording runner.
+
+        Args:
+            directory (str): dataset directory, created if missing
+            cmdrunner (CMDRunner): runner which executes the commands
+        """
+        self.runner = cmdrunner or CMDRunner()
+        self.path = self.runner.path
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def run(self, args, **kwargs):
+        """Runs a command, saves and returns the output.
+        """
+        result = self.runner.run(args, **kwargs)
+        with open(os.path.join(self.directory, dataset_name(args)), 'w', encoding='utf8') as f:
+            f.write(result[0])
+        return result
+
+
+class SessionCMDRunner(CMDRunner):
+    """Run commands in one interactive CLI process instead of a process per command.
+    mvcli reads commands from stdin and prints a prompt after every output, so the responses
+    are framed by the prompt. The CLI start (SG driver probe) is paid once and the adapter
+    selection stays in place across calls. Outputs have no per command banner.
+
+    Example:
+        with SessionCMDRunner('mvcli') as cmdrunner:
+            ctrl = mvcli.Controller(0, cmdrunner)
+    """
+    session = True
+    # output line of a failed command, the CLI has no exit code per command
+    ERROR = re.compile(r'^\s*(error\b|unknown command|invalid command)', re.IGNORECASE | re.MULTILINE)
+
+    def __init__(self, path='mvcli', prompt='> ', timeout=60, error=ERROR):
+        """Initialize a new session runner, the CLI is started by the first command.
+
+        Args:
+            path (str): path to the CLI binary
+            prompt (str): prompt printed by the CLI when it waits for a command
+            timeout (float): seconds to wait for the prompt after a command
+            error (re.Pattern): pattern of the output of a failed command
+        """
+        super().__init__(path)
+        self.prompt = prompt.encode('utf8')
+        self.timeout = timeout
+        self.error = error
+        # adapter selected in the CLI, see mvcli.Controller._select_adapter()
+        self.adapter_id = None
+        self._proc = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(self, args, **kwargs):
+        """Runs a command in the session and returns the output.
+        The return code is 1 if the output has an error line, which is returned as stderr,
+        or if the CLI exited or did not print the prompt in time, it is restarted by the next command.
+        """
+        cmd = self._command(args)
+        with self._lock:
+            try:
+                if self._proc is None or self._proc.poll() is not None:
+                    self._start()
+                self._proc.stdin.write(cmd.encode('utf8') + b'\n')
+                self._proc.stdin.flush()
+                out = self._read()
+            except (OSError, TimeoutError) as e:
+                self._kill()
+                return '', str(e), 1
+        lines = out.split('\n')
+        # the CLI may echo the command
+        if lines and lines[0].strip() in (cmd, self.prompt.decode('utf8') + cmd):
+            lines = lines[1:]
+        out = '\n'.join(lines)
+        error = self.error.search(out)
+        if error:
+            return out, out[error.start():].split('\n', 1)[0].strip(), 1
+        return out, '', 0
+
+    def run_many(self, args_list, max_workers=8, **kwargs):
+        """Runs a batch of commands one after another in the session"""
+        return [self.run(args, **kwargs) for args in args_list]
+
+    def close(self):
+        """Exit the CLI"""
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                try:
+                    self._proc.stdin.write(b'exit\n')
+                    self._proc.stdin.flush()
+                    self._proc.wait(5)
+                except (OSError, TimeoutExpired):
+                    self._kill()
+            self._proc = None
+
+    def _command(self, args):
+        """Get the session command of a command line, which is the command line without the binary"""
+        if type(args) != str:
+            args = ' '.join(args)
+        for binary in (self.path, os.path.basename(self.path)):
+            if args.startswith(binary + ' '):
+                return args[len(binary) + 1:]
+        return args
+
+    def _start(self):
+        self._proc = Popen([self.path], stdin=PIPE, stdout=PIPE, stderr=STDOUT)
+        # a new CLI has no adapter selected
+        self.adapter_id = None
+        # startup banner
+        self._read()
+
+    def _kill(self):
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+        self._proc = None
+
+    def _read(self):
+        """Read the output up to the next prompt
+
+        Returns:
+            str: output without the prompt
+        Raises:
+            TimeoutError: if the prompt is not printed in time
+            OSError: if the CLI exited
+        """
+        fd = self._proc.stdout.fileno()
+        buf = bytearray()
+        end = b'\n' + self.prompt
+        deadline = time.monotonic() + self.timeout
+        while not (buf == self.prompt or buf.endswith(end)):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f'{self.path} did not print the prompt in {self.timeout} seconds')
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise OSError(f'{self.path} exited')
+            buf += chunk
+        return buf[:-len(self.prompt)].decode('utf8')
+
+
+def which(binary):
+    """Get the full path of a binary, the lookups are cached for the process.
+
+    Args:
+        binary (str): binary name or path
+    Returns:
+        str: full path, None if the binary is not found
+    """
+    key = (binary, os.environ.get('PATH'))
+    try:
+        return _binaries[key]
+    except KeyError:
+        pass
+    path = shutil.which(binary)
+    with _binaries_lock:
+        _binaries[key] = path
+    return path
+
+
+def reset_binaries():
+    """Forget the cached binary paths, e.g. after a CLI was installed or moved"""
+    with _binaries_lock:
+        _binaries.clear()
+
+
+def innermost(cmdrunner):
+    """Get the runner which executes the commands of wrapper runners like CachedCMDRunner,
+    CLI state like the session flag and the selected mvcli adapter is kept on it.
+
+    Args:
+        cmdrunner: runner object
+    Returns:
+        runner object at the end of the wrapped runners
+    """
+    while hasattr(getattr(cmdrunner, 'runner', None), 'run'):
+        cmdrunner = cmdrunner.runner
+    return cmdrunner
+
+
+def dataset_name(args):
+    """Build a dataset file name from a command line.
+    arcconf: arcconf GETCONFIG 1 PD -> _GETCONFIG_1_PD
+    mvcli: mvcli info -o pd -> info_pd
+
+    Args:
+        args (str|list): command line
+    Returns:
+        str: file name
+    """
+    argv = shlex.split(args) if type(args) == str else list(args)
+    name = '_'.join([a for a in argv[1:] if not a.startswith('-')])
+    name = re.sub(r'[^\w.-]', '_', name)
+    if 'mvcli' in os.path.basename(argv[0]).lower():
+        return name
+    return '_' + name
+
+
+def load_state(path):
+    """Load a json state file like checkpoints of log readers
+
+    Args:
+        path (str): file path
+    Returns:
+        dict: state, empty if the file does not exist
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    import json
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    """Save a json state file, the file is replaced so it stays consistent if the process is killed while writing
+
+    Args:
+        path (str): file path
+        state (dict): state
+    """
+    import json
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
 def cut_lines(output, start, end=0):
     """Cut a number of lines from the start and the end.
 
@@ -79,6 +691,119 @@ def sanitize_stdout(output, last_line=''):
     return output if islist else '\n'.join(output)
 
 
+def split_sections(output):
+    """Split a full GETCONFIG output into its top level sections.
+    A top level section header is an unindented title wrapped by two separator lines, blank lines aside.
+    Framed titles which start with the first word of the current section, like the
+    Controller Version Information of some arcconf versions, are part of the current section.
+
+    Args:
+        output (str): command output from arcconf
+    Returns:
+        dict: section title -> section body, the same as a single section GETCONFIG output after cut_lines
+    """
+    lines = output.split('\n')
+    if len(lines) > 2 and not any(line.strip() for line in lines[1::2]):
+        # some arcconf versions print a blank line after every line
+        lines = lines[::2]
+    # indexes of the non blank lines
+    filled = [idx for idx, line in enumerate(lines) if line.strip()]
+    sections = {}
+    title = None
+    start = 0
+    pos = 0
+    while pos + 2 < len(filled):
+        first, middle, last = [lines[idx] for idx in filled[pos:pos + 3]]
+        if is_separator(first) and is_separator(last) and _is_section_title(middle, title):
+            if title:
+                sections[title] = lines[start:filled[pos]]
+            title = middle.strip()
+            start = filled[pos + 2] + 1
+            pos += 3
+            continue
+        pos += 1
+    if title:
+        sections[title] = lines[start:]
+    return {key: '\n'.join(sanitize_stdout(value)) for key, value in sections.items()}
+
+
+def _is_section_title(line, current=None):
+    """Check if a framed line is a top level section title, see split_sections()
+
+    Args:
+        line (str): line between two separators
+        current (str): title of the current section, None before the first one
+    """
+    if line[0].isspace() or SEPARATOR_ATTRIBUTE in line:
+        return False
+    return current is None or line.split()[0].lower() != current.split()[0].lower()
+
+
+def tokenize(lines):
+    """Single pass tokenizer of arcconf outputs. Lines are consumed one by one,
+    so an output can be parsed while it is still read from the pipe.
+
+    Args:
+        lines (iterable): output lines
+    Yields:
+        tuple: (section, subsection, key, value) events where section is the last framed title.
+            A framed title gives (title, None, None, None),
+            a line without a value gives (section, line, None, None),
+            a property gives (section, subsection, key, value)
+    """
+    section = ''
+    subsection = ''
+    title = None
+    after_separator = False
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if not stripped.replace('-', ''):
+            if title is not None:
+                section, subsection, title = title, '', None
+                yield section, None, None, None
+            after_separator = True
+            continue
+        if title is not None:
+            # the line after a separator was not framed by another one
+            subsection, title = title, None
+            yield section, subsection, None, None
+        if SEPARATOR_ATTRIBUTE in line:
+            key, value = line.split(SEPARATOR_ATTRIBUTE, 1)
+            yield section, subsection, key.strip(), value
+        elif after_separator:
+            title = stripped
+        else:
+            subsection = stripped
+            yield section, subsection, None, None
+        after_separator = False
+    if title is not None:
+        yield section, title, None, None
+
+
+def add_property(props, sub_section, key, value):
+    """Add a property event to a dict of properties, the same way as get_properties()
+
+    Args:
+        props (dict): properties
+        sub_section (str): sub section dict key, properties are not nested if empty
+        key (str): property key
+        value (str): property value
+    """
+    key = convert_key_dict(key)
+    value = convert_value_attribute(value)
+    if sub_section:
+        props.setdefault(sub_section, {})[key] = value
+    else:
+        props[key] = value
+
+
+def is_separator(line):
+    """Check if a line is an unindented section separator"""
+    return line.startswith('-') and not line.strip().replace('-', '')
+
+
 def convert_property(key, value=None):
     """Convert an attribute into the most pratical datatype.
 
@@ -94,10 +819,7 @@ def convert_property(key, value=None):
             # TODO: this print is only for debug, did not see this case, remove it later
             print(f'ERROR: {key} {value} is not a property')
             return
-        parts = key.split(SEPARATOR_ATTRIBUTE)
-        if len(parts) > 2:
-            parts[1] = SEPARATOR_ATTRIBUTE.join(parts[1:])
-        key, value = parts[0], parts[1]
+        key, value = key.split(SEPARATOR_ATTRIBUTE, 1)
     key = convert_key_attribute(key)
     value = convert_value_attribute(value)
     return key, value
@@ -105,34 +827,32 @@ def convert_property(key, value=None):
 
 def convert_value_attribute(value):
     """Convert a string to class attribute value"""
-    if len(value.split()) == 2:
+    parts = value.split()
+    if len(parts) == 2 and parts[1] in SIZE_UNITS and parts[0].isdigit():
         # converting to raw bytes
-        size, unit = value.split()
-        if size.isdigit() and unit in ['B', 'KB', 'MB', 'GB']:
-            return humanfriendly.parse_size(value)
+        return int(parts[0]) * SIZE_UNITS[parts[1]]
     value = value.strip()
-    if value.lower() in ['enabled', 'yes', 'true']:
+    lower = value.lower()
+    if lower in TRUE_VALUES:
         value = True
-    elif value.lower() in ['disabled', 'no', 'false']:
+    elif lower in FALSE_VALUES:
         value = False
     return value
 
 
+@functools.lru_cache(maxsize=1024)
 def convert_key_attribute(key):
-    """Convert a string to class attribute"""
-    if '(' in key:
-        key = key.split('(')[0]
-    key = key.strip().lower()
+    """Convert a string to class attribute, the results are memoized since the keys vocabulary is small"""
+    key = key.split('(', 1)[0].strip().lower()
     if not key:
         print('EMPTY KEY')
         return key
-    for char in [' ', '-', ',', '/']:
-        key = key.replace(char, '_')
+    key = key.translate(KEY_SEPARATORS)
     if key[0].isnumeric():
         # first char might be a number
         key = '_' + key
     # clear special chars
-    key = re.sub('[^a-zA-Z0-9\_]', '', key)
+    key = KEY_GARBAGE.sub('', key)
     return key.strip()
 
 
@@ -143,15 +863,18 @@ def convert_key_dict(line):
         if key.replace('-', ''):
             line = key
             break
-    key = line.split(SEPARATOR_ATTRIBUTE)[0]
-    if '(' in key:
-        key = key.split('(')[0]
-    key = key.strip()
+    key = _dict_key(line.split(SEPARATOR_ATTRIBUTE, 1)[0])
     if not key:
         print(f'EMPTY KEY: {line}')
     return key
 
 
+@functools.lru_cache(maxsize=1024)
+def _dict_key(key):
+    """Convert the key part of a line to dict key, the results are memoized since the keys vocabulary is small"""
+    return key.split('(', 1)[0].strip()
+
+
 def format_size(value):
     """Format a byte value to human readable.
 
@@ -160,6 +883,7 @@ def format_size(value):
     Return:
         str: formatted value with unit
     """
+    import humanfriendly
     return humanfriendly.format_size(value)
 
 
@@ -177,11 +901,9 @@ def get_properties(section):
             sub_section = convert_key_dict(line)
 
         if SEPARATOR_ATTRIBUTE in line:
-            parts = line.split(SEPARATOR_ATTRIBUTE)
-            if len(parts) > 2:
-                parts[1] = SEPARATOR_ATTRIBUTE.join(parts[1:])
-            key = convert_key_dict(parts[0])
-            value = convert_value_attribute(parts[1])
+            key, value = line.split(SEPARATOR_ATTRIBUTE, 1)
+            key = convert_key_dict(key)
+            value = convert_value_attribute(value)
             if sub_section:
                 if not props.get(sub_section, None):
                     props[sub_section] = {}
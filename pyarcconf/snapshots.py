@@ -0,0 +1,174 @@
+"""On-disk cache of parsed controller state.
+
+The state of a controller parsed from a GETCONFIG output (adapter info, arrays, logical
+and physical drives, enclosures) is pickled to a file named after the controller id and
+a hash of the output. A later run which gets the same output loads the file instead of parsing.
+The files are pickles, so the cache directory has to be private to the user of the cache.
+
+Example:
+    cache = SnapshotCache('/var/cache/pyarcconf')
+    ctrl = Controller(1, lazy=True)
+    ctrl.get_config(cache=cache)
+
+    # last stored state without running arcconf, the runner is used by later queries
+    ctrl = cache.load(1, CMDRunner())
+"""
+import hashlib
+import io
+import logging
+import os
+import pickle
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = '.pickle'
+# token of the controller object in the pickles, drives and arrays refer to it
+CONTROLLER = 'controller'
+# controller attributes parsed from a GETCONFIG output besides the adapter info
+ATTRIBUTES = ('facts', '_drives', '_enclosures', '_vds', '_arrays')
+# attribute groups of a GETCONFIG output, see Controller.SECTIONS
+SECTIONS = ('adapter', 'pds', 'vds', 'arrays')
+
+
+def digest(output):
+    """Get the cache key part of a command output"""
+    return hashlib.sha1(output.encode('utf8')).hexdigest()[:20]
+
+
+class SnapshotCache():
+    """Directory of parsed controller snapshots with size bounded LRU eviction."""
+
+    def __init__(self, directory, maxsize=64 * 1024 * 1024):
+        """Initialize a new snapshot cache.
+
+        Args:
+            directory (str): cache directory, created if missing
+            maxsize (int): max total size of the snapshot files in bytes
+        """
+        self.directory = directory
+        self.maxsize = maxsize
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def path(self, controller_id, output):
+        """Get the snapshot file of a controller output"""
+        return os.path.join(self.directory, f'{controller_id}-{digest(output)}{SUFFIX}')
+
+    def restore(self, controller, output):
+        """Load the snapshot of an output into a controller.
+
+        Args:
+            controller (Controller): controller object, its runner and settings are kept
+            output (str): GETCONFIG output
+        Returns:
+            bool: True if there was a snapshot of the output
+        """
+        path = self.path(controller.id, output)
+        try:
+            with open(path, 'rb') as f:
+                self._load(controller, f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            # e.g. a snapshot of an older pyarcconf version
+            logger.warning('Dropping snapshot %s: %r', path, e)
+            self._remove(path)
+            return False
+        # recently used snapshots are evicted last
+        os.utime(path)
+        return True
+
+    def store(self, controller, output):
+        """Save the parsed state of a controller, which is the adapter info, drives, enclosures,
+        logical drives and arrays. Settings like lazy mode and the other sections are not stored.
+
+        Args:
+            controller (Controller): parsed controller object
+            output (str): GETCONFIG output the controller was parsed from
+        """
+        attrs = (controller._adapter_attrs | set(ATTRIBUTES)) & set(vars(controller))
+        snapshot = {
+            'state': {attr: vars(controller)[attr] for attr in attrs},
+            'loaded': controller._loaded & set(SECTIONS),
+        }
+        buffer = io.BytesIO()
+        pickler = pickle.Pickler(buffer, pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = lambda obj: CONTROLLER if obj is controller else None
+        pickler.dump(snapshot)
+
+        path = self.path(controller.id, output)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp, path)
+        self.evict()
+
+    def load(self, controller_id, cmdrunner):
+        """Create a controller from its last stored snapshot, arcconf is not run.
+
+        Args:
+            controller_id (str): controller id
+            cmdrunner: runner object of the controller, e.g. a ReplayRunner for offline use,
+                it runs the queries of the sections not in the snapshot
+        Returns:
+            Controller: controller object, None if there is no snapshot
+        """
+        from .controller import Controller
+        snapshots = self._snapshots(str(controller_id))
+        if not snapshots:
+            return None
+        # lazy, so it is not queried on init
+        controller = Controller(controller_id, cmdrunner, lazy=True)
+        with open(snapshots[-1][2], 'rb') as f:
+            self._load(controller, f)
+        return controller
+
+    def evict(self):
+        """Remove the least recently used snapshots until the total size is within maxsize"""
+        snapshots = self._snapshots()
+        total = sum(size for _, size, _ in snapshots)
+        for _, size, path in snapshots:
+            if total <= self.maxsize:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        """Remove all the snapshots"""
+        for _, _, path in self._snapshots():
+            self._remove(path)
+
+    @staticmethod
+    def _load(controller, f):
+        unpickler = pickle.Unpickler(f)
+        unpickler.persistent_load = lambda pid: controller if pid == CONTROLLER else None
+        snapshot = unpickler.load()
+        controller.__dict__.update(snapshot['state'])
+        controller._adapter_attrs |= set(snapshot['state']) - set(ATTRIBUTES)
+        controller._loaded |= snapshot['loaded']
+
+    def _snapshots(self, controller_id=None):
+        """Get the snapshot files, least recently used first
+
+        Returns:
+            list: list of (mtime, size, path)
+        """
+        snapshots = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(SUFFIX):
+                    continue
+                if controller_id is not None and entry.name.rsplit('-', 1)[0] != controller_id:
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                snapshots.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(snapshots)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,304 @@
+"""Structured change events of a controller.
+
+Example:
+    for event in Watcher(controller, interval=30):
+        print(event)
+
+    async for event in Watcher(controller_with_async_runner):
+        print(event)
+"""
+import re
+import time
+
+from . import runner
+
+CELSIUS = re.compile(r'(-?\d+)\s*(?:deg\s*)?C\b')
+
+# watched section -> arcconf command, command args and number of header lines
+COMMANDS = {
+    'adapter': ('GETCONFIG', ['AD'], 4),
+    'pds': ('GETCONFIG', ['PD'], 4),
+    'vds': ('GETCONFIG', ['LD'], 4),
+    'tasks': ('GETSTATUS', [], 1),
+}
+
+
+def celsius(value):
+    """Get the celsius degrees of a temperature value like '46 C/ 114 F (Normal)' or '30 deg C'
+
+    Args:
+        value (str): temperature value
+    Returns:
+        int: degrees, None if the value is not a temperature
+    """
+    match = CELSIUS.search(str(value))
+    return int(match.group(1)) if match else None
+
+
+class Event():
+    """Base class of the watcher events."""
+
+    def __init__(self, controller):
+        self.controller = controller
+
+    def __repr__(self):
+        """Define a basic representation of the class object."""
+        attrs = []
+        for key, value in vars(self).items():
+            if key == 'controller':
+                continue
+            if hasattr(value, 'channel'):
+                value = f'{value.channel},{value.device}'
+            elif hasattr(value, 'task_id'):
+                value = value.task_id
+            elif hasattr(value, 'id'):
+                value = value.id
+            attrs.append(f'{key}={value}')
+        return '<{} Controller {} | {}>'.format(type(self).__name__, self.controller.id, ' '.join(attrs))
+
+
+class DriveAdded(Event):
+    """A physical drive was connected"""
+    def __init__(self, controller, drive):
+        super().__init__(controller)
+        self.drive = drive
+
+
+class DriveRemoved(Event):
+    """A physical drive is gone"""
+    def __init__(self, controller, drive):
+        super().__init__(controller)
+        self.drive = drive
+
+
+class DriveStateChanged(Event):
+    """State of a physical drive changed"""
+    def __init__(self, controller, drive, old, new):
+        super().__init__(controller)
+        self.drive = drive
+        self.old = old
+        self.new = new
+
+
+class LogicalDeviceStatusChanged(Event):
+    """Status of a logical device changed, old is None for a new device and new is None for a deleted one"""
+    def __init__(self, controller, ld, old, new):
+        super().__init__(controller)
+        self.ld = ld
+        self.old = old
+        self.new = new
+
+
+class LogicalDeviceDegraded(LogicalDeviceStatusChanged):
+    """Status of a logical device changed to other than Optimal"""
+
+
+class TaskProgress(Event):
+    """Percentage of a task changed, old is None for a new task and new is None for a finished one"""
+    def __init__(self, controller, task, old, new):
+        super().__init__(controller)
+        self.task = task
+        self.old = old
+        self.new = new
+
+
+class TemperatureThreshold(Event):
+    """Temperature of a source crossed the threshold, exceeded is False when it went back below it"""
+    def __init__(self, controller, source, value, threshold, exceeded):
+        super().__init__(controller)
+        self.source = source
+        self.value = value
+        self.threshold = threshold
+        self.exceeded = exceeded
+
+
+class EnclosureAdded(Event):
+    """An enclosure or expander was connected"""
+    def __init__(self, controller, enclosure):
+        super().__init__(controller)
+        self.enclosure = enclosure
+
+
+class EnclosureRemoved(Event):
+    """An enclosure or expander is gone"""
+    def __init__(self, controller, enclosure):
+        super().__init__(controller)
+        self.enclosure = enclosure
+
+
+class Watcher():
+    """Poll a controller and yield the changes between successive snapshots as events.
+
+    Sections whose output did not change since the previous poll are not parsed again,
+    drives are refreshed in place with Controller.refresh_pds().
+    The first successful poll of a section records its baseline, only temperatures above the threshold are reported by it.
+    """
+
+    def __init__(self, controller, interval=30, temperature_threshold=55, sections=None):
+        """Initialize a new watcher.
+
+        Args:
+            controller (Controller): controller to watch
+            interval (int): seconds between polls
+            temperature_threshold (int): celsius degrees which trigger a TemperatureThreshold event
+            sections (list): watched sections out of COMMANDS, all of them if not given
+        """
+        self.controller = controller
+        self.interval = interval
+        self.temperature_threshold = temperature_threshold
+        self.sections = list(sections or COMMANDS)
+        # section -> hash of its last parsed output, a section without one has no baseline yet
+        self._digests = {}
+        self._enclosures = {}
+        self._ld_status = {}
+        self._tasks = {}
+        # section -> {temperature source: degrees}
+        self._temperatures = {}
+        self._hot = set()
+
+    def __iter__(self):
+        return self.watch()
+
+    def __aiter__(self):
+        return self.async_watch()
+
+    def watch(self):
+        """Poll the controller forever.
+
+        Returns:
+            iterator: events
+        """
+        while True:
+            yield from self.poll()
+            time.sleep(self.interval)
+
+    async def async_watch(self):
+        """Async version of watch(), the controller runner has to be an AsyncCMDRunner"""
+        import asyncio
+        while True:
+            for event in await self.async_poll():
+                yield event
+            await asyncio.sleep(self.interval)
+
+    def poll(self):
+        """Take a snapshot of the controller and diff it with the previous one.
+
+        Returns:
+            list: events
+        """
+        outputs = {}
+        for section in self.sections:
+            cmd, args, _ = COMMANDS[section]
+            outputs[section] = self.controller._exec(cmd, args)
+        return self._diff(outputs)
+
+    async def async_poll(self):
+        """Async version of poll(), all sections are queried concurrently"""
+        import asyncio
+        results = await asyncio.gather(*[
+            self.controller._async_exec(COMMANDS[section][0], COMMANDS[section][1]) for section in self.sections
+        ])
+        return self._diff(dict(zip(self.sections, results)))
+
+    def _diff(self, outputs):
+        """Parse the changed section outputs and build the events
+
+        Args:
+            outputs (dict): section -> (output, return code)
+        Returns:
+            list: events
+        """
+        events = []
+        for section, (output, rc) in outputs.items():
+            # a failed command is not a change, the section is checked again on next poll
+            if rc or not output:
+                continue
+            digest = hash(output)
+            previous = self._digests.get(section)
+            if previous == digest:
+                continue
+            self._digests[section] = digest
+            result = runner.cut_lines(output, COMMANDS[section][2])
+            getattr(self, f'_diff_{section}')(result, events, previous is None)
+        self._diff_temperatures(events)
+        return events
+
+    def _diff_adapter(self, result, events, baseline):
+        self.controller.update(result)
+        temperatures = {}
+        value = celsius(getattr(self.controller, 'temperature', ''))
+        if value is not None:
+            temperatures['controller'] = value
+        for sensor_id, sensor in getattr(self.controller, 'temperature_sensors', {}).items():
+            value = celsius(sensor.get('Current Value', ''))
+            if value is not None:
+                temperatures[f'sensor {sensor_id} {sensor.get("Location", "")}'.strip()] = value
+        self._temperatures['adapter'] = temperatures
+
+    def _diff_pds(self, result, events, baseline):
+        diff = self.controller.refresh_pds(result)
+        enclosures = {(e.channel, e.device): e for e in self.controller.enclosures}
+        if not baseline:
+            events += [DriveAdded(self.controller, d) for d in diff['added']]
+            events += [DriveRemoved(self.controller, d) for d in diff['removed']]
+            for drive, changes in diff['changed'].items():
+                if 'State' in changes:
+                    events.append(DriveStateChanged(self.controller, drive, *changes['State']))
+            events += [EnclosureAdded(self.controller, e) for key, e in enclosures.items() if key not in self._enclosures]
+            events += [EnclosureRemoved(self.controller, e) for key, e in self._enclosures.items() if key not in enclosures]
+        self._enclosures = enclosures
+
+        temperatures = {}
+        for drive in self.controller._drives:
+            value = celsius(getattr(drive, 'current_temperature', ''))
+            if value is not None:
+                temperatures[f'drive {drive.channel},{drive.device}'] = value
+        for enclosure in enclosures.values():
+            for key, value in enclosure.facts.items():
+                value = celsius(value) if key.startswith('Temperature') else None
+                if value is not None:
+                    temperatures[f'enclosure {enclosure.channel},{enclosure.device} {key}'] = value
+        self._temperatures['pds'] = temperatures
+
+    def _diff_vds(self, result, events, baseline):
+        if 'not supported' in result or 'No logical devices configured' in result:
+            vds = []
+        else:
+            vds = self.controller.get_vds(result)
+        status = {ld.id: ld for ld in vds}
+        if not baseline:
+            for ld_id in self._ld_status.keys() | status.keys():
+                old = self._ld_status.get(ld_id)
+                ld = status.get(ld_id)
+                new = getattr(ld, 'status_of_logical_device', None) if ld else None
+                if old == new:
+                    continue
+                event = LogicalDeviceDegraded if new not in (None, 'Optimal') else LogicalDeviceStatusChanged
+                events.append(event(self.controller, ld or ld_id, old, new))
+        self._ld_status = {ld_id: getattr(ld, 'status_of_logical_device', None) for ld_id, ld in status.items()}
+
+    def _diff_tasks(self, result, events, baseline):
+        tasks = {(t.logical_device, t.task_id): t for t in self.controller.get_tasks(result)}
+        if not baseline:
+            for key in self._tasks.keys() | tasks.keys():
+                old = self._tasks.get(key)
+                task = tasks.get(key)
+                new = task.percentage_complete if task else None
+                if old != new:
+                    events.append(TaskProgress(self.controller, task or key, old, new))
+        self._tasks = {key: task.percentage_complete for key, task in tasks.items()}
+
+    def _diff_temperatures(self, events):
+        threshold = self.temperature_threshold
+        for temperatures in self._temperatures.values():
+            for source, value in temperatures.items():
+                if (value > threshold) == (source in self._hot):
+                    continue
+                if value > threshold:
+                    self._hot.add(source)
+                else:
+                    self._hot.discard(source)
+                events.append(TemperatureThreshold(self.controller, source, value, threshold, value > threshold))
+        # sources which are gone are not hot anymore
+        sources = set().union(*self._temperatures.values())
+        self._hot &= sources
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FAKE_CLI = '''#!{python}
+import os, sys
+sys.path.insert(0, {root!r})
+from pyarcconf.runner import DATASETS, dataset_name
+directory = os.path.join(DATASETS, {dataset!r})
+files = {{f.lower(): f for f in os.listdir(directory)}}
+name = dataset_name(sys.argv).lower()
+if name not in files:
+    sys.exit(1)
+with open(os.path.join(directory, files[name])) as f:
+    sys.stdout.write(f.read())
+'''
+
+
+@pytest.fixture
+def fake_cli(tmp_path):
+    """Create an executable which prints the captured outputs of a bundled dataset, see runner.ReplayRunner
+
+    Returns:
+        function: (dataset, binary name) -> executable path
+    """
+    def make(dataset, binary='arcconf'):
+        directory = tmp_path / dataset
+        directory.mkdir(exist_ok=True)
+        path = directory / binary
+        path.write_text(FAKE_CLI.format(python=sys.executable, root=ROOT, dataset=dataset))
+        path.chmod(0o755)
+        return str(path)
+    return make
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from pyarcconf import runner
+from pyarcconf.controller import Controller
+
+
+class AsyncReplayRunner(runner.ReplayRunner):
+    """asyncio version of ReplayRunner, the commands in failing return no output and rc 1"""
+    asynchronous = True
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.failing = set()
+
+    async def run(self, args, **kwargs):
+        if runner.dataset_name(args).lower() in self.failing:
+            return '', 'failed', 1
+        return super().run(args, **kwargs)
+
+
+def test_async_methods():
+    ctrl = Controller(1, AsyncReplayRunner('hba'))
+    asyncio.run(ctrl.async_update())
+    assert ctrl.controller_model == 'MSCC Adaptec HBA 1100-16i'
+    assert len(asyncio.run(ctrl.async_get_pds())) == 7
+    assert asyncio.run(ctrl.async_get_vds()) == []
+
+
+def test_async_methods_with_failed_commands():
+    cmdrunner = AsyncReplayRunner('hba')
+    cmdrunner.failing = {'_getconfig_1_ad', '_getconfig_1_pd', '_getconfig_1_ld', '_getstatus_1', '_getlogs_1_event'}
+    ctrl = Controller(1, cmdrunner)
+    asyncio.run(ctrl.async_update())
+    assert not hasattr(ctrl, 'controller_model')
+    assert asyncio.run(ctrl.async_get_pds()) == []
+    assert asyncio.run(ctrl.async_get_vds()) == []
+    assert asyncio.run(ctrl.async_get_tasks()) == []
+    assert asyncio.run(ctrl.async_get_logs()) == {}
+
+
+def test_async_failed_refresh_keeps_the_drives():
+    cmdrunner = AsyncReplayRunner('hba')
+    ctrl = Controller(1, cmdrunner)
+    assert len(asyncio.run(ctrl.async_refresh_pds())['added']) == 7
+    drives = list(ctrl._drives)
+    cmdrunner.failing = {'_getconfig_1_pd'}
+    with pytest.raises(RuntimeError):
+        asyncio.run(ctrl.async_refresh_pds())
+    assert ctrl._drives == drives
@@ -0,0 +1,20 @@
+from pyarcconf import benchmark
+
+
+def test_mvcli_cases_parse_the_dataset():
+    cases = dict(benchmark.mvcli_cases())
+    assert sorted(cases) == ['mvcli get_events', 'mvcli get_pds', 'mvcli get_vds']
+    assert len(cases['mvcli get_pds']()) == 1
+    assert len(cases['mvcli get_events']()) == 6
+
+
+def test_measure_counts_the_allocations_of_a_call():
+    result = benchmark.measure(lambda: [object() for _ in range(1000)], number=1)
+    assert result['allocations'] >= 1000
+    assert result['peak_kib'] > 0
+
+
+def test_import_time_is_within_budget():
+    result = benchmark.import_time()
+    assert result['loaded'] == []
+    assert result['usec'] <= benchmark.IMPORT_BUDGET_USEC
@@ -0,0 +1,122 @@
+import shutil
+
+import pytest
+
+from pyarcconf import runner
+from pyarcconf.controller import Controller, get_controllers
+
+# facts which differ between the single section and the full GETCONFIG fixtures,
+# they were captured at different times and anonymized separately
+VOLATILE = ('Serial', 'Serial number', 'Serial Number', 'Controller Serial Number', 'World-wide name',
+            'World Wide Name', 'Controller World Wide Name', 'Drive Unique ID', 'Current Temperature')
+
+
+class CountingRunner(runner.ReplayRunner):
+    """Replay runner which records the dataset names of the commands it ran"""
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.calls = []
+
+    def run(self, args, **kwargs):
+        self.calls.append(runner.dataset_name(args).lower())
+        return super().run(args, **kwargs)
+
+
+def test_parallel_discovery_queries_each_section_once():
+    cmdrunner = CountingRunner('hba')
+    controllers = get_controllers(cmdrunner, parallel=True)
+    assert cmdrunner.calls == ['_list', '_getconfig_1_ad', '_getconfig_1_pd', '_getconfig_1_ld', '_getstatus_1']
+    assert controllers[0].controller_model == 'MSCC Adaptec HBA 1100-16i'
+    assert len(controllers[0].drives) == 7
+    assert not controllers[0].lazy
+    assert controllers[0]._loaded == Controller(1, runner.ReplayRunner('hba'))._loaded | {'pds', 'vds', 'tasks'}
+    assert controllers[0].arrays == []
+    assert controllers[0].tasks == []
+    assert len(cmdrunner.calls) == 5
+
+
+def test_snapshot_discovery_runs_a_single_getconfig():
+    cmdrunner = CountingRunner('hba')
+    controllers = get_controllers(cmdrunner, snapshot=True)
+    assert cmdrunner.calls == ['_list', '_getconfig_1']
+    assert controllers[0].controller_model == 'MSCC Adaptec HBA 1100-16i'
+    assert len(controllers[0]._drives) == 7
+
+    cmdrunner = CountingRunner('hba')
+    get_controllers(cmdrunner, parallel=True, snapshot=True)
+    assert cmdrunner.calls == ['_list', '_getconfig_1', '_getstatus_1']
+
+
+def _parsed(ctrl):
+    """Get the parsed facts of a controller and its drives, logical drives and arrays"""
+    def facts(obj):
+        return {key: value for key, value in obj.facts.items() if key not in VOLATILE}
+    return (facts(ctrl), [facts(d) for d in ctrl._drives], [facts(ld) for ld in ctrl._vds],
+            [facts(a) for a in ctrl._arrays], len(ctrl._enclosures))
+
+
+@pytest.mark.parametrize('dataset', ['hba', 'raid_unconfigured'])
+def test_snapshot_parses_like_the_section_calls(dataset):
+    sections = Controller(1, runner.ReplayRunner(dataset))
+    sections.get_pds()
+    sections.get_vds()
+    sections.get_arrays()
+    snapshot = Controller(1, runner.ReplayRunner(dataset), snapshot=True)
+    assert _parsed(snapshot) == _parsed(sections)
+
+
+def test_snapshot_of_a_double_spaced_output(tmp_path):
+    # an old arcconf version prints a blank line after every line
+    output = runner.DATASETS + '/unknown_versions/__getconfig_1'
+    shutil.copy(output, tmp_path / '_getconfig_1')
+    shutil.copy(output, tmp_path / '_getconfig_1_AD')
+    adapter = Controller(1, runner.ReplayRunner(str(tmp_path)))
+    snapshot = Controller(1, runner.ReplayRunner(str(tmp_path)), snapshot=True)
+    assert snapshot.controller_model == 'IBM ServeRAID 8k-l'
+    assert snapshot.controller_status == 'Okay'
+    assert {key: adapter.facts[key] for key in snapshot.facts} == snapshot.facts
+    assert [d.serial for d in snapshot._drives] == ['JFXGHVPC', 'JFWAZENC']
+    assert [ld.facts['Logical drive name'] for ld in snapshot._vds] == ['raid1']
+    assert len(snapshot._enclosures) == 1
+
+
+def test_lazy_controller_queries_sections_only():
+    cmdrunner = CountingRunner('hba')
+    ctrl = Controller(1, cmdrunner, lazy=True)
+    assert not hasattr(ctrl, 'controller_model')
+    assert not hasattr(ctrl, '__length_hint__')
+    repr(ctrl)
+    assert cmdrunner.calls == []
+
+    assert ctrl.facts['Controller Model'] == 'MSCC Adaptec HBA 1100-16i'
+    assert ctrl.controller_model == 'MSCC Adaptec HBA 1100-16i'
+    assert ctrl.hba
+    assert cmdrunner.calls == ['_getconfig_1_ad']
+
+
+def test_drives_of_a_controller_without_drives_are_loaded_once(tmp_path):
+    shutil.copy(runner.DATASETS + '/hba/_getconfig_1_AD', tmp_path)
+    (tmp_path / '_getconfig_1_PD').write_text('Controllers found: 1\n' + 70 * '-' +
+                                              '\nPhysical Device information\n' + 70 * '-' + '\n')
+    for lazy in (True, False):
+        cmdrunner = CountingRunner(str(tmp_path))
+        ctrl = Controller(1, cmdrunner, lazy=lazy)
+        cmdrunner.calls.clear()
+        assert ctrl.drives == []
+        assert ctrl.drives == []
+        assert cmdrunner.calls == ['_getconfig_1_pd']
+
+
+def test_failed_refresh_keeps_the_drives(fake_cli):
+    # the unknown_versions dataset has no GETCONFIG PD output, the command exits with 1
+    ctrl = Controller(1, runner.CMDRunner(fake_cli('unknown_versions')), lazy=True)
+    with open(runner.DATASETS + '/hba/_getconfig_1_PD') as f:
+        ctrl.refresh_pds(runner.cut_lines(runner.sanitize_stdout(f.read(), 'Command '), 4))
+    drives = list(ctrl._drives)
+    enclosures = list(ctrl._enclosures)
+    assert len(drives) == 7
+    with pytest.raises(RuntimeError):
+        ctrl.refresh_pds()
+    assert ctrl._drives == drives
+    assert ctrl._enclosures == enclosures
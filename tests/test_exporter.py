@@ -0,0 +1,23 @@
+from pyarcconf import runner
+from pyarcconf.controller import Controller
+from pyarcconf.exporter import Exporter
+
+
+def test_refresh_with_subprocess_runner(fake_cli):
+    exporter = Exporter(runner.CMDRunner(fake_cli('hba')))
+    metrics = exporter.refresh().decode('utf8')
+    assert exporter.errors == {}
+    assert 'arcconf_controller_info{controller="1"' in metrics
+    assert 'arcconf_pd_state{controller="1",channel="0",device="1"' in metrics
+    assert 'arcconf_pd_phy_errors{controller="1",channel="0",device="2"' in metrics
+
+
+def test_failed_sections_are_logged(fake_cli, caplog, capsys):
+    # the raid dataset has no GETCONFIG AD output
+    ctrl = Controller(1, runner.CMDRunner(fake_cli('raid')), lazy=True)
+    exporter = Exporter(controllers=[ctrl], phy_errors=False)
+    metrics = exporter.refresh().decode('utf8')
+    assert exporter.errors == {('1', 'adapter'): 1}
+    assert 'arcconf_collect_errors_total{controller="1",section="adapter"} 1' in metrics
+    assert [record.getMessage().split(':')[0] for record in caplog.records] == ['Controller 1 adapter collection failed']
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,61 @@
+import threading
+import time
+
+from pyarcconf import runner
+from pyarcconf.inventory import Inventory
+
+
+class ConcurrencyRunner(runner.ReplayRunner):
+    """Replay runner which records the max number of commands running at the same time"""
+
+    def __init__(self, directory, path):
+        super().__init__(directory, path)
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def run(self, args, **kwargs):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.01)
+        try:
+            return super().run(args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+def test_collect_with_subprocess_runners(fake_cli):
+    inventory = Inventory(binaries={'arcconf': fake_cli('hba'), 'mvcli': fake_cli('mvcli', 'mvcli')})
+    controllers = inventory.collect()
+    assert inventory.errors == {}
+    assert [ctrl.vendor for ctrl in controllers] == ['arcconf', 'mvcli']
+    assert len(controllers[0].pds) == 7
+    assert [pd.serial for pd in controllers[1].pds] == ['MMYE3021500000009068']
+
+
+def test_mvcli_controllers_are_queried_one_at_a_time():
+    cmdrunner = ConcurrencyRunner('mvcli', 'mvcli')
+    # a host with two Marvell adapters
+    cmdrunner._outputs['info_hba'] = 'Adapter ID: 0\n\nAdapter ID: 1\n'
+    inventory = Inventory(runners={'mvcli': cmdrunner}, binaries={'mvcli': 'mvcli'})
+    controllers = inventory.collect()
+    assert inventory.errors == {}
+    assert [ctrl.id for ctrl in controllers] == ['0', '1']
+    assert cmdrunner.max_running == 1
+
+
+class BrokenRunner(runner.ReplayRunner):
+    """Replay runner whose commands cannot be started"""
+
+    def run(self, args, **kwargs):
+        raise OSError('cannot run %s' % args[0])
+
+
+def test_failed_vendor_is_logged(caplog, capsys):
+    inventory = Inventory(runners={'arcconf': BrokenRunner('hba')}, binaries={})
+    assert inventory.collect() == []
+    assert list(inventory.errors) == ['arcconf']
+    assert [record.getMessage().split(':')[0] for record in caplog.records] == ['arcconf inventory failed']
+    assert capsys.readouterr().out == ''
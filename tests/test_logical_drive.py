@@ -0,0 +1,15 @@
+from pyarcconf import runner
+from pyarcconf.controller import Controller
+
+
+def test_member_drives_are_the_controller_drives():
+    cmdrunner = runner.ReplayRunner('raid')
+    # the raid dataset has the LD output of all the logical drives only
+    cmdrunner._files['_getconfig_1_ld_0'] = cmdrunner._files['_getconfig_1_ld']
+    ctrl = Controller(1, cmdrunner, lazy=True)
+    drives = ctrl.get_pds()
+    ld = ctrl.get_vds()[0]
+    members = ld.drives
+    assert members
+    assert all(any(member is drive for drive in drives) for member in members)
+    assert all(drive is refreshed for drive, refreshed in zip(drives, ctrl._drives))
@@ -0,0 +1,129 @@
+import sys
+
+from pyarcconf import mvcli, runner
+
+# interactive CLI which answers info and adapter commands and fails on the others
+FAKE_SHELL = '''#!{python}
+import sys
+sys.stdout.write('SG driver version 3.5.36.\\nWelcome to RAID Command Line Interface.\\n\\n> ')
+sys.stdout.flush()
+for line in sys.stdin:
+    cmd = line.strip()
+    if cmd == 'exit':
+        break
+    if cmd.startswith('info'):
+        sys.stdout.write('Adapter ID:   0\\nProduct:      1b4b-9230\\n')
+    elif not cmd.startswith('adapter'):
+        sys.stdout.write('Error: Unknown parameter\\n')
+    sys.stdout.write('\\n> ')
+    sys.stdout.flush()
+'''
+
+
+class SessionRunner(runner.ReplayRunner):
+    """Replay runner which mimics SessionCMDRunner, the outputs have no banner"""
+    session = True
+
+    def __init__(self):
+        super().__init__('mvcli', path='mvcli')
+        self.adapter_id = None
+        self.calls = []
+        self._outputs['info_hba_0'] = 'Adapter ID:   0\nProduct:      1b4b-9230\n'
+        self._outputs['adapter_0'] = self._outputs['adapter_1'] = ''
+
+    def run(self, args, **kwargs):
+        self.calls.append(runner.dataset_name(args))
+        return super().run(args, **kwargs)
+
+
+class CountingRunner(runner.ReplayRunner):
+    """Replay runner of the mvcli dataset which records the commands it ran"""
+
+    def __init__(self):
+        super().__init__('mvcli', path='mvcli')
+        self.calls = []
+
+    def run(self, args, **kwargs):
+        self.calls.append(runner.dataset_name(args))
+        return super().run(args, **kwargs)
+
+
+def test_session_state_through_wrapper_runners():
+    session = SessionRunner()
+    cmdrunner = runner.CoalescingCMDRunner(runner.CachedCMDRunner(session))
+    ctrl = mvcli.Controller(0, cmdrunner)
+    # no banner cut on a session
+    assert ctrl.product == '1b4b-9230'
+    assert session.adapter_id == '0'
+    assert session.calls.count('adapter_0') == 1
+
+    # a session restart forgets the selected adapter
+    session.adapter_id = None
+    ctrl.get_pds()
+    assert session.calls.count('adapter_0') == 2
+
+
+def test_cached_reads_per_adapter():
+    session = SessionRunner()
+    cmdrunner = runner.CachedCMDRunner(session)
+    for adapter in ('0', '1', '0', '1'):
+        cmdrunner.run(['mvcli', 'adapter', '-i', adapter])
+        cmdrunner.run(['mvcli', 'info', '-o', 'pd'])
+    # the adapter selection is run every time, the reads once per adapter
+    assert session.calls.count('adapter_0') == 2
+    assert session.calls.count('info_pd') == 2
+
+    # a change invalidates the reads of the selected adapter only
+    cmdrunner.run(['mvcli', 'set', '-o', 'vd', '-i', '0', '-n', 'name'])
+    cmdrunner.run(['mvcli', 'info', '-o', 'pd'])
+    cmdrunner.run(['mvcli', 'adapter', '-i', '0'])
+    cmdrunner.run(['mvcli', 'info', '-o', 'pd'])
+    assert session.calls.count('info_pd') == 3
+
+
+def test_event_polls_keep_the_cached_reads():
+    replay = CountingRunner()
+    ctrl = mvcli.Controller(0, runner.CachedCMDRunner(replay))
+    ctrl.get_pds()
+    for _ in range(3):
+        assert len(ctrl.get_events()) == 6
+        ctrl.get_pds()
+    assert replay.calls.count('info_pd') == 1
+    assert replay.calls.count('event') == 1
+
+
+def test_tail_events_writes_the_checkpoint_once_per_poll(tmp_path, monkeypatch):
+    checkpoint = str(tmp_path / 'events.json')
+    saves = []
+    save_state = runner.save_state
+    monkeypatch.setattr(runner, 'save_state', lambda path, state: saves.append(dict(state)) or save_state(path, state))
+    ctrl = mvcli.Controller(0, SessionRunner())
+    assert [e.sequence for e in ctrl.tail_events(checkpoint=checkpoint)] == [0, 1, 2, 3, 4, 5]
+    assert saves == [{'0': 5}]
+
+    # an event whose processing was interrupted is returned again
+    ctrl = mvcli.Controller(0, SessionRunner())
+    ctrl.event_sequence = -1
+    events = ctrl.tail_events(checkpoint=checkpoint)
+    next(events)
+    next(events)
+    events.close()
+    assert runner.load_state(checkpoint) == {'0': 0}
+
+
+def test_session_return_codes(tmp_path):
+    path = tmp_path / 'mvcli'
+    path.write_text(FAKE_SHELL.format(python=sys.executable))
+    path.chmod(0o755)
+    with runner.SessionCMDRunner(str(path), timeout=10) as session:
+        assert runner.innermost(runner.CachedCMDRunner(session)).adapter_id is None
+        out, err, rc = session.run([str(path), 'info', '-o', 'hba'])
+        assert (err, rc) == ('', 0)
+        assert 'Product:      1b4b-9230' in out
+        assert session.run([str(path), 'adapter', '-i', '0'])[2] == 0
+        out, err, rc = session.run([str(path), 'create', '-o', 'vd', '-r', '1'])
+        assert (err, rc) == ('Error: Unknown parameter', 1)
+
+        ctrl = mvcli.Controller(0, runner.CachedCMDRunner(session))
+        assert ctrl.product == '1b4b-9230'
+        assert session.adapter_id == '0'
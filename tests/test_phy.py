@@ -0,0 +1,13 @@
+from pyarcconf import runner
+from pyarcconf.controller import Controller
+
+
+def test_phy_error_table_rows_have_the_device_counters_only():
+    ctrl = Controller(1, runner.ReplayRunner('hba'), lazy=True)
+    table = ctrl.get_phy_errors()
+    sas = set(table[(None, None, '0')])
+    sata = set(table[('0', '2', '0')])
+    assert 'invalid_dword_count' in sas and not sas & sata
+    assert set(table[('0', '4', '1')]) == sas
+    assert set(table.device('0', '2').names) == sata
+    assert set(table.delta(table)[('0', '2', '0')]) == sata
@@ -0,0 +1,130 @@
+import glob
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pyarcconf import runner
+from pyarcconf.controller import Controller
+
+FIXTURES = sorted(glob.glob(os.path.join(runner.DATASETS, '*', '*')))
+
+
+# normalization functions before they were precompiled and memoized, the reference of the parsed values
+def _convert_value_attribute(value):
+    import humanfriendly
+    if len(value.split()) == 2:
+        size, unit = value.split()
+        if size.isdigit() and unit in ['B', 'KB', 'MB', 'GB']:
+            return humanfriendly.parse_size(value)
+    value = value.strip()
+    if value.lower() in ['enabled', 'yes', 'true']:
+        value = True
+    elif value.lower() in ['disabled', 'no', 'false']:
+        value = False
+    return value
+
+
+def _convert_key_attribute(key):
+    if '(' in key:
+        key = key.split('(')[0]
+    key = key.strip().lower()
+    if not key:
+        return key
+    for char in [' ', '-', ',', '/']:
+        key = key.replace(char, '_')
+    if key[0].isnumeric():
+        key = '_' + key
+    key = re.sub(r'[^a-zA-Z0-9\_]', '', key)
+    return key.strip()
+
+
+def _convert_key_dict(line):
+    for key in line.split('\n'):
+        if key.replace('-', ''):
+            line = key
+            break
+    key = line.split(runner.SEPARATOR_ATTRIBUTE)[0]
+    if '(' in key:
+        key = key.split('(')[0]
+    return key.strip()
+
+
+@pytest.mark.parametrize('path', FIXTURES, ids=lambda path: os.path.relpath(path, runner.DATASETS))
+def test_normalization_of_the_fixtures_is_unchanged(path):
+    pytest.importorskip('humanfriendly')
+    with open(path, encoding='utf8') as f:
+        lines = [line for line in f.read().split('\n') if line.strip()]
+    for line in lines:
+        assert runner.convert_key_dict(line) == _convert_key_dict(line)
+        if runner.SEPARATOR_ATTRIBUTE not in line:
+            continue
+        key, value = line.split(runner.SEPARATOR_ATTRIBUTE, 1)
+        assert runner.convert_key_attribute(key) == _convert_key_attribute(key)
+        expected = _convert_value_attribute(value)
+        assert runner.convert_value_attribute(value) == expected
+        assert type(runner.convert_value_attribute(value)) == type(expected)
+
+
+def test_dict_keys_are_memoized_per_key():
+    runner._dict_key.cache_clear()
+    runner.convert_key_dict('Serial number : A')
+    runner.convert_key_dict('Serial number : B')
+    info = runner._dict_key.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+class SlowRunner(runner.ReplayRunner):
+    """Replay runner which takes a while per command and records the commands it ran"""
+
+    def __init__(self, directory, delay=0.2):
+        super().__init__(directory)
+        self.delay = delay
+        self.calls = []
+
+    def run(self, args, **kwargs):
+        self.calls.append(runner.dataset_name(args).lower())
+        time.sleep(self.delay)
+        return super().run(args, **kwargs)
+
+
+def concurrently(func, number=4):
+    """Call func from several threads at the same time and return the results"""
+    barrier = threading.Barrier(number)
+
+    def call():
+        barrier.wait()
+        return func()
+
+    with ThreadPoolExecutor(max_workers=number) as pool:
+        return list(pool.map(lambda _: call(), range(number)))
+
+
+def test_concurrent_reads_share_one_run():
+    slow = SlowRunner('hba')
+    cmdrunner = runner.CoalescingCMDRunner(slow)
+    results = concurrently(lambda: cmdrunner.run(['arcconf', 'GETCONFIG', '1', 'AD']))
+    assert slow.calls == ['_getconfig_1_ad']
+    assert all(result is results[0] for result in results)
+
+
+def test_commands_are_not_shared():
+    slow = SlowRunner('hba', delay=0.05)
+    cmdrunner = runner.CoalescingCMDRunner(slow)
+    concurrently(lambda: cmdrunner.run(['arcconf', 'SETNAME', '1', 'LOGICALDRIVE', '0', 'name']))
+    assert slow.calls == ['_setname_1_logicaldrive_0_name'] * 4
+
+
+def test_concurrent_parse_calls_share_the_parsed_result():
+    slow = SlowRunner('hba')
+    ctrl = Controller(1, runner.CoalescingCMDRunner(slow), lazy=True)
+    results = concurrently(ctrl.get_pds)
+    assert slow.calls == ['_getconfig_1_pd']
+    assert len(results[0]) == 7
+    assert all(result is results[0] for result in results)
+    # a call made by the shared call itself runs on its own
+    flights = runner.SingleFlight()
+    assert flights.do('key', lambda: flights.do('key', lambda: 1) + 1) == 2
@@ -0,0 +1,42 @@
+from pyarcconf import runner
+from pyarcconf.controller import Controller
+from pyarcconf.snapshots import SnapshotCache
+
+
+def test_restore_keeps_the_controller_settings(tmp_path):
+    cache = SnapshotCache(str(tmp_path))
+    cmdrunner = runner.ReplayRunner('hba')
+    stored = Controller(1, cmdrunner, lazy=True)
+    stored.get_config(cache=cache)
+
+    restored = Controller(1, cmdrunner, lazy=True, snapshot=True)
+    restored.get_tasks()
+    tasks = restored._tasks
+    restored.get_config(cache=cache)
+    assert restored.lazy
+    assert restored._tasks is tasks
+    assert restored._loaded == {'adapter', 'pds', 'tasks'}
+    assert restored.controller_model == 'MSCC Adaptec HBA 1100-16i'
+    assert all(drive.controller is restored for drive in restored._drives)
+
+    loaded = cache.load(1, cmdrunner)
+    assert loaded.runner is cmdrunner
+    assert loaded._loaded == {'adapter', 'pds'}
+    assert len(loaded._drives) == 7
+    # the sections not in the snapshot are queried through the given runner
+    assert loaded.tasks == tasks
+    assert loaded._loaded == {'adapter', 'pds', 'tasks'}
+
+
+def test_broken_snapshots_are_logged_and_dropped(tmp_path, caplog, capsys):
+    cache = SnapshotCache(str(tmp_path))
+    cmdrunner = runner.ReplayRunner('hba')
+    Controller(1, cmdrunner, lazy=True).get_config(cache=cache)
+    [path] = tmp_path.iterdir()
+    path.write_bytes(b'not a pickle')
+
+    restored = Controller(1, cmdrunner, lazy=True)
+    restored.get_config(cache=cache)
+    assert restored.controller_model == 'MSCC Adaptec HBA 1100-16i'
+    assert [record.getMessage().split(':')[0] for record in caplog.records] == [f'Dropping snapshot {path}']
+    assert capsys.readouterr().out == ''
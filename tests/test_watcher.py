@@ -0,0 +1,38 @@
+from pyarcconf import runner
+from pyarcconf.controller import Controller
+from pyarcconf.watcher import Watcher
+
+
+class FailingRunner(runner.ReplayRunner):
+    """Replay runner whose commands in failing return no output and rc 1"""
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.failing = set()
+
+    def run(self, args, **kwargs):
+        if runner.dataset_name(args).lower() in self.failing:
+            return '', 'failed', 1
+        return super().run(args, **kwargs)
+
+
+def test_first_successful_poll_of_a_section_is_its_baseline():
+    cmdrunner = FailingRunner('hba')
+    watcher = Watcher(Controller(1, cmdrunner, lazy=True), temperature_threshold=100)
+    cmdrunner.failing.add('_getconfig_1_pd')
+    assert watcher.poll() == []
+    cmdrunner.failing.clear()
+    assert watcher.poll() == []
+    assert len(watcher.controller._drives) == 7
+
+
+def test_drive_changes_after_the_baseline():
+    cmdrunner = FailingRunner('hba')
+    watcher = Watcher(Controller(1, cmdrunner, lazy=True), temperature_threshold=100, sections=['pds'])
+    assert watcher.poll() == []
+    output = cmdrunner.run(['arcconf', 'GETCONFIG', '1', 'PD'])[0]
+    # the drive of device 0,15 was replaced
+    cmdrunner._outputs['_getconfig_1_pd'] = output.replace('220531234567', '220539999999')
+    events = watcher.poll()
+    assert sorted(type(e).__name__ for e in events) == ['DriveAdded', 'DriveRemoved']
+    assert {e.drive.serial for e in events} == {'220531234567', '220539999999'}